@@ -18,68 +18,152 @@ __version__ = "0.2.1"
 __author__ = "Matteo Subet"
 __email__ = "matteo.subet@supsi.ch"
 
-# Import main components
-from .api_client import FabManagerAPIClient
-from .clean_machines_data import clean_html_keep_links as clean_html_keep_links_machines
-from .clean_machines_data import (
-    clean_machine_record,
-    clean_machines_data,
-)
-from .clean_machines_data import (
-    extract_timestamp_from_filename as extract_timestamp_from_filename_machines,
-)
-from .clean_reservations_machine import (
-    calculate_time_spent,
-)
-from .clean_reservations_machine import (
-    clean_reservation_record as clean_machine_reservation_record,
-)
-from .clean_reservations_machine import (
-    clean_reservations_machine_data,
-)
-from .clean_reservations_training import (
-    clean_reservation_record as clean_training_reservation_record,
-)
-from .clean_reservations_training import (
-    clean_reservations_training_data,
-)
-from .clean_trainings_data import (
-    clean_html_keep_links as clean_html_keep_links_trainings,
-)
-from .clean_trainings_data import (
-    clean_training_record,
-    clean_trainings_data,
-)
-from .clean_trainings_data import (
-    extract_timestamp_from_filename as extract_timestamp_from_filename_trainings,
-)
-from .extract_machines import (
-    extract_and_save_machines,
-    extract_machines,
-    save_machines,
-)
-from .extract_reservation import (
-    divide_reservations_by_type,
-    extract_and_save_reservations,
-    extract_reservations,
-    save_reservations,
-)
-from .extract_trainings import (
-    extract_and_save_trainings,
-    extract_trainings,
-    save_trainings,
-)
-from .extract_users import (
-    extract_and_save_users,
-    extract_users,
-    save_users,
-)
+import importlib
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+# Functions named like the submodule defining them are imported eagerly. Importing
+# a submodule binds it as a package attribute, so once e.g. the CLI or user code
+# imported `fabmanager_data_analyzer_zumat.merge_cleaned_data`, __getattr__ would
+# never be called for that name and the module would shadow the function.
+from .clean_machines_data import clean_machines_data
+from .clean_trainings_data import clean_trainings_data
+from .extract_machines import extract_machines
+from .extract_trainings import extract_trainings
+from .extract_users import extract_users
 from .merge_cleaned_data import merge_cleaned_data
-from .utils import clean_data_for_json, sanitize_filename
 
-# Backward compatibility - provide non-aliased versions defaulting to machines
-clean_html_keep_links = clean_html_keep_links_machines
-extract_timestamp_from_filename = extract_timestamp_from_filename_machines
+# Other public names and the (module, attribute) they are loaded from. These
+# submodules are imported on first access (PEP 562).
+_LAZY_IMPORTS: Dict[str, Tuple[str, str]] = {
+    # API Client
+    "FabManagerAPIClient": (".api_client", "FabManagerAPIClient"),
+    # Machines
+    "save_machines": (".extract_machines", "save_machines"),
+    "extract_and_save_machines": (".extract_machines", "extract_and_save_machines"),
+    # Reservations
+    "extract_reservations": (".extract_reservation", "extract_reservations"),
+    "save_reservations": (".extract_reservation", "save_reservations"),
+    "extract_and_save_reservations": (
+        ".extract_reservation",
+        "extract_and_save_reservations",
+    ),
+    "divide_reservations_by_type": (
+        ".extract_reservation",
+        "divide_reservations_by_type",
+    ),
+    # Trainings
+    "save_trainings": (".extract_trainings", "save_trainings"),
+    "extract_and_save_trainings": (".extract_trainings", "extract_and_save_trainings"),
+    # Users
+    "save_users": (".extract_users", "save_users"),
+    "extract_and_save_users": (".extract_users", "extract_and_save_users"),
+    # Data Cleaning - Machines
+    "clean_machine_record": (".clean_machines_data", "clean_machine_record"),
+    "clean_html_keep_links_machines": (".clean_machines_data", "clean_html_keep_links"),
+    "extract_timestamp_from_filename_machines": (
+        ".clean_machines_data",
+        "extract_timestamp_from_filename",
+    ),
+    # Data Cleaning - Trainings
+    "clean_training_record": (".clean_trainings_data", "clean_training_record"),
+    "clean_html_keep_links_trainings": (
+        ".clean_trainings_data",
+        "clean_html_keep_links",
+    ),
+    "extract_timestamp_from_filename_trainings": (
+        ".clean_trainings_data",
+        "extract_timestamp_from_filename",
+    ),
+    # Data Cleaning - Reservations (Machine)
+    "clean_reservations_machine_data": (
+        ".clean_reservations_machine",
+        "clean_reservations_machine_data",
+    ),
+    "clean_machine_reservation_record": (
+        ".clean_reservations_machine",
+        "clean_reservation_record",
+    ),
+    "calculate_time_spent": (".clean_reservations_machine", "calculate_time_spent"),
+    # Data Cleaning - Reservations (Training)
+    "clean_reservations_training_data": (
+        ".clean_reservations_training",
+        "clean_reservations_training_data",
+    ),
+    "clean_training_reservation_record": (
+        ".clean_reservations_training",
+        "clean_reservation_record",
+    ),
+    # Backward compatibility - non-aliased versions defaulting to machines
+    "clean_html_keep_links": (".clean_machines_data", "clean_html_keep_links"),
+    "extract_timestamp_from_filename": (
+        ".clean_machines_data",
+        "extract_timestamp_from_filename",
+    ),
+    # Utils
+    "clean_data_for_json": (".utils", "clean_data_for_json"),
+    "sanitize_filename": (".utils", "sanitize_filename"),
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Import public names from their submodule on first access."""
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module_name = _LAZY_IMPORTS[name][0]
+    module = importlib.import_module(module_name, __name__)
+
+    # Bind every name provided by this submodule
+    for public_name, (source, attribute) in _LAZY_IMPORTS.items():
+        if source == module_name:
+            globals()[public_name] = getattr(module, attribute)
+
+    return globals()[name]
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:
+    from .api_client import FabManagerAPIClient
+    from .clean_machines_data import (
+        clean_html_keep_links as clean_html_keep_links_machines,
+    )
+    from .clean_machines_data import clean_machine_record
+    from .clean_machines_data import (
+        extract_timestamp_from_filename as extract_timestamp_from_filename_machines,
+    )
+    from .clean_reservations_machine import calculate_time_spent
+    from .clean_reservations_machine import (
+        clean_reservation_record as clean_machine_reservation_record,
+    )
+    from .clean_reservations_machine import clean_reservations_machine_data
+    from .clean_reservations_training import (
+        clean_reservation_record as clean_training_reservation_record,
+    )
+    from .clean_reservations_training import clean_reservations_training_data
+    from .clean_trainings_data import (
+        clean_html_keep_links as clean_html_keep_links_trainings,
+    )
+    from .clean_trainings_data import clean_training_record
+    from .clean_trainings_data import (
+        extract_timestamp_from_filename as extract_timestamp_from_filename_trainings,
+    )
+    from .extract_machines import extract_and_save_machines, save_machines
+    from .extract_reservation import (
+        divide_reservations_by_type,
+        extract_and_save_reservations,
+        extract_reservations,
+        save_reservations,
+    )
+    from .extract_trainings import extract_and_save_trainings, save_trainings
+    from .extract_users import extract_and_save_users, save_users
+    from .utils import clean_data_for_json, sanitize_filename
+
+    # Backward compatibility - provide non-aliased versions defaulting to machines
+    clean_html_keep_links = clean_html_keep_links_machines
+    extract_timestamp_from_filename = extract_timestamp_from_filename_machines
 
 # Package metadata
 __all__ = [
@@ -4,29 +4,115 @@ FabManager API Client
 This module provides a client for interacting with the FabManager Open API.
 """
 
+import hashlib
+import json
 import logging
-from typing import Dict, Generator, List, Optional, Union
+import math
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Deque, Dict, Generator, List, Optional, Tuple, Union
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+
+from .utils import load_json_file, parse_json
 
 logger = logging.getLogger(__name__)
 
+# Number of keep-alive connections kept per host. The pool of a session created
+# by the client grows to the page prefetch concurrency when that is larger, since
+# urllib3 discards (and warns about) connections that do not fit in the pool.
+POOL_MAXSIZE = 16
+
+# Retry policy for transient failures (rate limiting and server errors).
+# Waits 0.3s, 0.6s, 1.2s, ... between attempts and honours Retry-After.
+RETRY_STRATEGY = Retry(
+    total=5,
+    backoff_factor=0.3,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset(["GET", "HEAD"]),
+    raise_on_status=False,
+)
+
+# Minimum number of seconds between two progress updates in the console
+PROGRESS_INTERVAL = 0.1
+
+# One entry of an RFC-5988 Link header: <url>; ...; rel="name"
+_LINK_RE = re.compile(
+    r"<(?P<url>[^>]*)>[^,<]*?;\s*rel\s*=\s*[\"']?(?P<rel>[^\"',;\s]+)"
+)
+
+# Response headers stored with cached pages: the pagination metadata and the
+# validators sent back on the next request
+_CACHED_HEADERS = ("Total", "Per-Page", "Link", "ETag", "Last-Modified")
+
+
+def _write_private_file(path: Path, content: bytes) -> None:
+    """
+    Write a file readable and writable by the current user only (mode 0600).
+
+    Args:
+        path: Destination file path
+        content: File content
+    """
+    # The mode given to os.open only applies to new files, so the file is
+    # recreated rather than truncated
+    path.unlink(missing_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(content)
+
 
 class FabManagerAPIClient:
     """Client for interacting with the FabManager Open API."""
 
-    def __init__(self, base_url: str, api_token: str):
+    def __init__(
+        self,
+        base_url: str,
+        api_token: str,
+        session: Optional[requests.Session] = None,
+        cache_dir: Optional[Union[str, Path]] = None,
+    ):
         """
         Initialize the API client.
 
         Args:
             base_url: Base URL of the API
             api_token: Your API authentication token
+            session: Existing requests session to reuse (optional). Its adapters are
+                     left untouched; the authentication headers are added to it.
+                     If None, a new session with connection pooling and retries
+                     is created.
+            cache_dir: Directory where fetched pages are cached (optional). Pages
+                       are then requested conditionally (If-None-Match /
+                       If-Modified-Since) and read from the cache when the server
+                       answers 304 Not Modified. If None, nothing is cached.
+                       The cache holds the raw API responses, including personal
+                       data such as user names and email addresses: its files are
+                       created readable by the current user only, and pages are
+                       keyed by API token so clients with different tokens never
+                       share them.
         """
         self.base_url = base_url.rstrip("/")
         self.api_token = api_token
-        self.session = requests.Session()
+
+        # Size of the connection pool of the session, None for a session given by
+        # the caller, which is left as it is
+        self._pool_maxsize: Optional[int] = None
+        if session is None:
+            self.session = requests.Session()
+            self._mount_adapter(POOL_MAXSIZE)
+        else:
+            self.session = session
+
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
 
         # Set default headers
         self.session.headers.update(
@@ -36,6 +122,23 @@ class FabManagerAPIClient:
             }
         )
 
+    def _mount_adapter(self, pool_maxsize: int) -> None:
+        """
+        Mount an adapter that pools connections and retries transient failures.
+
+        Args:
+            pool_maxsize: Number of keep-alive connections kept per host
+        """
+        # Close the adapters being replaced, so their pooled connections are
+        # released now rather than on garbage collection
+        for old_adapter in set(self.session.adapters.values()):
+            old_adapter.close()
+
+        adapter = HTTPAdapter(pool_maxsize=pool_maxsize, max_retries=RETRY_STRATEGY)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._pool_maxsize = pool_maxsize
+
     def test_connection(self) -> tuple[bool, str]:
         """
         Test the API connection and authentication.
@@ -49,7 +152,10 @@ class FabManagerAPIClient:
             params = {"page": 1, "per_page": 1}
 
             logger.info("Testing API connection...")
-            response = self.session.get(endpoint, params=params, timeout=10)
+            # HEAD only needs the status code; fall back to GET if not allowed
+            response = self.session.head(endpoint, params=params, timeout=10)
+            if response.status_code in (405, 501):
+                response = self.session.get(endpoint, params=params, timeout=10)
 
             if response.status_code == 200:
                 return True, "Connection successful"
@@ -91,14 +197,36 @@ class FabManagerAPIClient:
 
         try:
             logger.info(f"Fetching page {page} from {endpoint}")
-            response = self.session.get(full_endpoint, params=params)
+            cached = self._load_cached_page(full_endpoint, params)
+            headers = {}
+            if cached is not None:
+                if "ETag" in cached[0]:
+                    headers["If-None-Match"] = cached[0]["ETag"]
+                if "Last-Modified" in cached[0]:
+                    headers["If-Modified-Since"] = cached[0]["Last-Modified"]
+
+            response = self.session.get(full_endpoint, params=params, headers=headers)
             response.raise_for_status()
 
+            response_headers: Union[Dict[str, str], CaseInsensitiveDict[str]]
+            if cached is not None and response.status_code == 304:
+                logger.info(f"Page {page} from {endpoint} not modified, using cache")
+                response_headers, content = cached
+            else:
+                response_headers, content = response.headers, response.content
+
             # Extract pagination metadata from headers
-            pagination_info = self._extract_pagination_info(response.headers)
+            pagination_info = self._extract_pagination_info(response_headers)
 
             # Parse response
-            response_data = response.json()
+            try:
+                response_data = parse_json(content)
+            except ValueError:
+                # Let requests report the error (JSONDecodeError is a RequestException)
+                response_data = response.json()
+
+            if response.status_code != 304:
+                self._store_cached_page(full_endpoint, params, response)
 
             # Handle both direct array and wrapped response
             if isinstance(response_data, dict) and data_key in response_data:
@@ -112,6 +240,174 @@ class FabManagerAPIClient:
             logger.error(f"Error fetching data from {endpoint}: {e}")
             raise
 
+    def _cache_path(self, url: str, params: Dict) -> Path:
+        """
+        Return the cache file path of a page, without extension.
+
+        Args:
+            url: Full endpoint URL
+            params: Query parameters of the page request
+
+        Returns:
+            Path inside cache_dir identifying the request
+        """
+        assert self.cache_dir is not None
+        query = "&".join(f"{key}={value}" for key, value in sorted(params.items()))
+        # The token is part of the key: what a page contains depends on the
+        # permissions of the token it was fetched with
+        request = f"{self.api_token}\n{url}?{query}"
+        key = hashlib.sha256(request.encode("utf-8")).hexdigest()
+        return self.cache_dir / key
+
+    def _load_cached_page(
+        self, url: str, params: Dict
+    ) -> Optional[Tuple[Dict[str, str], bytes]]:
+        """
+        Load a cached page.
+
+        Args:
+            url: Full endpoint URL
+            params: Query parameters of the page request
+
+        Returns:
+            Tuple of (stored response headers, response body), or None if caching
+            is disabled or the page is not cached
+        """
+        if self.cache_dir is None:
+            return None
+
+        path = self._cache_path(url, params)
+        try:
+            headers = load_json_file(path.with_suffix(".meta.json"))
+            content = path.with_suffix(".body.json").read_bytes()
+        except (OSError, ValueError):
+            return None
+
+        return headers, content
+
+    def _store_cached_page(
+        self, url: str, params: Dict, response: requests.Response
+    ) -> None:
+        """
+        Cache a page if its response carries a validator (ETag or Last-Modified).
+
+        Args:
+            url: Full endpoint URL
+            params: Query parameters of the page request
+            response: Successful response of the page request
+        """
+        if self.cache_dir is None:
+            return
+
+        headers = {
+            name: response.headers[name]
+            for name in _CACHED_HEADERS
+            if name in response.headers
+        }
+        if "ETag" not in headers and "Last-Modified" not in headers:
+            return
+
+        path = self._cache_path(url, params)
+        self.cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+        try:
+            # Drop the old validators first, so an interrupted write never pairs
+            # them with the new body
+            path.with_suffix(".meta.json").unlink(missing_ok=True)
+            _write_private_file(path.with_suffix(".body.json"), response.content)
+            _write_private_file(
+                path.with_suffix(".meta.json"), json.dumps(headers).encode("utf-8")
+            )
+        except OSError as e:
+            # E.g. another process caching the same page; the page is fetched
+            # again next time
+            logger.warning(f"Could not cache page {url} {params}: {e}")
+
+    def _iter_pages(
+        self,
+        endpoint: str,
+        data_key: str,
+        per_page: int,
+        max_pages: Optional[int],
+        concurrency: int,
+    ) -> Generator[Tuple[int, Dict], None, None]:
+        """
+        Generator that yields page results in order, prefetching ahead when possible.
+
+        The first page is fetched on its own to read the pagination metadata. When
+        the server reports a total item count, the remaining pages are requested
+        concurrently through a sliding window of at most `concurrency` requests,
+        while still being yielded in page order. The connection pool of a session
+        created by the client is enlarged to `concurrency` when needed. Without a
+        total, pages are fetched sequentially following the Link header.
+
+        Args:
+            endpoint: API endpoint path
+            data_key: Key in response containing the data array
+            per_page: Number of items per page
+            max_pages: Maximum number of pages to fetch (optional)
+            concurrency: Maximum number of pages requested at the same time
+
+        Yields:
+            Tuples of (page number, result dictionary from _get_endpoint_data)
+        """
+        first = self._get_endpoint_data(endpoint, data_key, 1, per_page)
+        yield 1, first
+
+        pagination = first["pagination"]
+        if not pagination.get("has_next") or not first["data"]:
+            return
+
+        next_page = 2
+        total = pagination.get("total")
+        page_size = pagination.get("per_page") or per_page
+
+        if concurrency > 1 and total and page_size > 0:
+            last_page = math.ceil(total / page_size)
+            if max_pages:
+                last_page = min(last_page, max_pages)
+
+            # Keep one pooled connection per concurrent request
+            if self._pool_maxsize is not None and self._pool_maxsize < concurrency:
+                self._mount_adapter(concurrency)
+
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                pending: Deque[Tuple[int, Future]] = deque()
+                try:
+                    while pending or next_page <= last_page:
+                        # Keep the prefetch window full
+                        while next_page <= last_page and len(pending) < concurrency:
+                            future = executor.submit(
+                                self._get_endpoint_data,
+                                endpoint,
+                                data_key,
+                                next_page,
+                                per_page,
+                            )
+                            pending.append((next_page, future))
+                            next_page += 1
+
+                        page, future = pending.popleft()
+                        result = future.result()
+                        yield page, result
+
+                        if (
+                            not result["pagination"].get("has_next")
+                            or not result["data"]
+                        ):
+                            return
+                finally:
+                    # Drop prefetched pages that are no longer needed
+                    for _, future in pending:
+                        future.cancel()
+
+        # Total unknown (or more pages than announced): follow the Link header
+        while not max_pages or next_page <= max_pages:
+            result = self._get_endpoint_data(endpoint, data_key, next_page, per_page)
+            yield next_page, result
+            if not result["pagination"].get("has_next") or not result["data"]:
+                return
+            next_page += 1
+
     def _get_all_data(
         self,
         endpoint: str,
@@ -119,6 +415,7 @@ class FabManagerAPIClient:
         per_page: int = 100,
         max_pages: Optional[int] = None,
         show_progress: bool = True,
+        concurrency: int = 4,
     ) -> Generator[Dict, None, None]:
         """
         Generator that fetches all data across all pages.
@@ -129,29 +426,26 @@ class FabManagerAPIClient:
             per_page: Number of items per page
             max_pages: Maximum number of pages to fetch (optional)
             show_progress: Whether to show progress in console (default: True)
+            concurrency: Maximum number of pages fetched at the same time (default: 4).
+                        Use 1 to fetch pages strictly one after the other.
 
         Yields:
             Individual data records
         """
-        page = 1
+        page = 0
         total_items = 0
+        last_progress = 0.0
 
-        while True:
-            if max_pages and page > max_pages:
-                logger.info(f"Reached max_pages limit ({max_pages})")
-                if show_progress:
-                    print(
-                        f"\r✓ Fetched {total_items} items from {page-1} pages",
-                        flush=True,
-                    )
-                break
-
-            result = self._get_endpoint_data(endpoint, data_key, page, per_page)
+        for page, result in self._iter_pages(
+            endpoint, data_key, per_page, max_pages, concurrency
+        ):
             data = result["data"]
             pagination = result["pagination"]
 
-            # Show progress
-            if show_progress:
+            # Show progress, at most once per PROGRESS_INTERVAL
+            now = time.monotonic()
+            if show_progress and now - last_progress >= PROGRESS_INTERVAL:
+                last_progress = now
                 total = pagination.get("total")
                 if total:
                     percentage = min(100, (total_items / total) * 100)
@@ -182,8 +476,13 @@ class FabManagerAPIClient:
                         flush=True,
                     )
                 break
-
-            page += 1
+        else:
+            logger.info(f"Reached max_pages limit ({max_pages})")
+            if show_progress:
+                print(
+                    f"\r✓ Fetched {total_items} items from {page} pages",
+                    flush=True,
+                )
 
     def fetch_all_as_list(
         self,
@@ -192,6 +491,7 @@ class FabManagerAPIClient:
         per_page: int = 100,
         max_pages: Optional[int] = None,
         show_progress: bool = True,
+        concurrency: int = 4,
     ) -> List[Dict]:
         """
         Fetch all data and return as a list.
@@ -202,12 +502,15 @@ class FabManagerAPIClient:
             per_page: Number of items per page
             max_pages: Maximum number of pages to fetch (optional)
             show_progress: Whether to show progress in console (default: True)
+            concurrency: Maximum number of pages fetched at the same time (default: 4)
 
         Returns:
             List of all data records
         """
         all_data = list(
-            self._get_all_data(endpoint, data_key, per_page, max_pages, show_progress)
+            self._get_all_data(
+                endpoint, data_key, per_page, max_pages, show_progress, concurrency
+            )
         )
         logger.info(f"Total items fetched: {len(all_data)}")
         return all_data
@@ -233,22 +536,25 @@ class FabManagerAPIClient:
         }
 
         # Extract Total
-        if "Total" in headers:
+        total = headers.get("Total")
+        if total:
             try:
-                pagination["total"] = int(headers["Total"])
+                pagination["total"] = int(total)
             except ValueError:
                 pass
 
         # Extract Per-Page
-        if "Per-Page" in headers:
+        per_page = headers.get("Per-Page")
+        if per_page:
             try:
-                pagination["per_page"] = int(headers["Per-Page"])
+                pagination["per_page"] = int(per_page)
             except ValueError:
                 pass
 
         # Parse Link header (RFC-5988)
-        if "Link" in headers:
-            links = self._parse_link_header(headers["Link"])
+        link_header = headers.get("Link")
+        if link_header is not None:
+            links = self._parse_link_header(link_header)
             pagination["links"] = links
             pagination["has_next"] = "next" in links
             pagination["has_prev"] = "prev" in links
@@ -265,25 +571,31 @@ class FabManagerAPIClient:
         Returns:
             Dictionary mapping rel types to URLs
         """
-        links = {}
-
-        for link in link_header.split(","):
-            link = link.strip()
-            if not link:
-                continue
-
-            # Extract URL and rel
-            parts = link.split(";")
-            if len(parts) >= 2:
-                url = parts[0].strip().strip("<>")
-                rel = None
-
-                for part in parts[1:]:
-                    if "rel=" in part:
-                        rel = part.split("=")[1].strip().strip("\"'")
-                        break
+        return {
+            match.group("rel"): match.group("url").strip()
+            for match in _LINK_RE.finditer(link_header)
+        }
 
-                if rel:
-                    links[rel] = url
 
-        return links
+@lru_cache(maxsize=8)
+def _get_client(
+    base_url: str, api_token: str, cache_dir: Optional[Union[str, Path]] = None
+) -> FabManagerAPIClient:
+    """
+    Return a shared API client for a FabManager instance.
+
+    The extract_* functions use this so that consecutive extractions from the same
+    instance reuse the pooled connections of one session instead of opening new
+    TCP/TLS connections for each endpoint.
+
+    Args:
+        base_url: Base URL of the API
+        api_token: API authentication token
+        cache_dir: Directory where fetched pages are cached (optional)
+
+    Returns:
+        FabManagerAPIClient instance shared by calls with the same arguments
+    """
+    return FabManagerAPIClient(
+        base_url=base_url, api_token=api_token, cache_dir=cache_dir
+    )
@@ -6,12 +6,18 @@ as Open Data. It offers various cleaning options including filtering disabled ma
 creating linked data, handling timestamps, and cleaning HTML content.
 """
 
-import json
 import re
 from datetime import datetime
-from html.parser import HTMLParser
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Literal, Optional, Tuple, Union
+from typing import Callable, Dict, List, Literal, Optional, Tuple
+
+from .utils import COMPRESSION_EXTENSIONS
+from .utils import clean_html_keep_links as _clean_html_keep_links
+from .utils import load_json_file, map_records, write_json_file
+
+# Timestamp in FabManager export filenames: DD_MM_YYYY_HH-MM
+_TIMESTAMP_RE = re.compile(r"(\d{2})_(\d{2})_(\d{4})_(\d{2})-(\d{2})")
 
 
 def extract_timestamp_from_filename(filename: str) -> Optional[str]:
@@ -30,9 +36,7 @@ def extract_timestamp_from_filename(filename: str) -> Optional[str]:
         >>> extract_timestamp_from_filename('FabManager_ExportedData_Machines_01_01_2025_00-00.json')
         '2025-01-01T00:00'
     """
-    # Pattern: DD_MM_YYYY_HH-MM
-    pattern = r"(\d{2})_(\d{2})_(\d{4})_(\d{2})-(\d{2})"
-    match = re.search(pattern, filename)
+    match = _TIMESTAMP_RE.search(filename)
 
     if match:
         day, month, year, hour, minute = match.groups()
@@ -45,59 +49,13 @@ def extract_timestamp_from_filename(filename: str) -> Optional[str]:
     return None
 
 
-class HTMLLinkExtractor(HTMLParser):
-    """
-    Custom HTML parser to extract text while preserving external links.
-
-    This parser removes all HTML tags but keeps external links in a readable format,
-    converting <a href="url">text</a> to "text (url)".
-    """
-
-    def __init__(self):
-        super().__init__()
-        self.result = []
-        self.current_link = None
-        self.current_text = []
-
-    def handle_starttag(self, tag, attrs):
-        """Handle opening tags, capturing link URLs."""
-        if tag == "a":
-            # Extract href attribute
-            for attr_name, attr_value in attrs:
-                if attr_name == "href":
-                    self.current_link = attr_value
-                    break
-
-    def handle_endtag(self, tag):
-        """Handle closing tags, formatting links."""
-        if tag == "a" and self.current_link:
-            # Add the link in format: text (url)
-            link_text = "".join(self.current_text).strip()
-            if link_text:
-                self.result.append(f"{link_text} ({self.current_link})")
-            self.current_link = None
-            self.current_text = []
-
-    def handle_data(self, data):
-        """Handle text content."""
-        if self.current_link is not None:
-            # We're inside a link, collect the text
-            self.current_text.append(data)
-        else:
-            # Regular text, add it directly
-            self.result.append(data)
-
-    def get_text(self):
-        """Get the cleaned text with preserved links."""
-        return "".join(self.result).strip()
-
-
 def clean_html_keep_links(html_content: Optional[str]) -> str:
     """
     Clean HTML content while preserving external links.
 
     Removes all HTML tags but converts links to a readable format:
-    <a href="https://example.com">Click here</a> becomes "Click here (https://example.com)"
+    <a href="https://example.com">Click here</a> becomes "Click here (https://example.com)".
+    Runs of whitespace are collapsed into single spaces.
 
     Args:
         html_content: HTML string to clean, or None
@@ -110,20 +68,37 @@ def clean_html_keep_links(html_content: Optional[str]) -> str:
         >>> clean_html_keep_links(html)
         'Visit our site (https://example.com) for more.'
     """
-    if not html_content:
-        return ""
-
-    parser = HTMLLinkExtractor()
-    try:
-        parser.feed(html_content)
-        text = parser.get_text()
-        # Clean up multiple spaces and newlines
-        text = re.sub(r"\s+", " ", text)
-        return text.strip()
-    except Exception:
-        # If parsing fails, fall back to simple tag removal
-        text = re.sub(r"<[^>]+>", "", html_content)
-        return re.sub(r"\s+", " ", text).strip()
+    return _clean_html_keep_links(html_content)
+
+
+def _keep_timestamp(value: Optional[str]) -> Optional[str]:
+    """Timestamp handler for mode 'all': keep the full timestamp as-is."""
+    return value
+
+
+def _keep_date_only(value: Optional[str]) -> Optional[str]:
+    """Timestamp handler for mode 'only_date': keep only the date part."""
+    if value:
+        # Extract date part from ISO timestamp
+        try:
+            return value.split("T")[0]
+        except Exception:
+            return value
+    return value
+
+
+def _remove_timestamp(value: Optional[str]) -> None:
+    """Timestamp handler for mode 'remove': drop the field."""
+    return None
+
+
+# Timestamp handler for each processing mode. The mode is resolved once per
+# cleaning run instead of once per field.
+_TIMESTAMP_HANDLERS: Dict[str, Callable[[Optional[str]], Optional[str]]] = {
+    "all": _keep_timestamp,
+    "only_date": _keep_date_only,
+    "remove": _remove_timestamp,
+}
 
 
 def process_timestamp_field(
@@ -148,20 +123,7 @@ def process_timestamp_field(
         >>> process_timestamp_field('2025-01-01T00:00:00Z', 'remove')
         None
     """
-    if mode == "remove":
-        return None
-
-    if mode == "only_date" and value:
-        # Extract date part from ISO timestamp
-        try:
-            # Handle various ISO format variations
-            date_part = value.split("T")[0]
-            return date_part
-        except Exception:
-            return value
-
-    # mode == 'all' or any other case
-    return value
+    return _TIMESTAMP_HANDLERS.get(mode, _keep_timestamp)(value)
 
 
 def create_linked_data_uri(
@@ -186,6 +148,66 @@ def create_linked_data_uri(
     return f"{base_domain}/{slug}"
 
 
+def _linked_data_base(
+    create_linked_data: bool, base_domain: Optional[str]
+) -> Optional[str]:
+    """Return the normalized base for linked data URLs, or None if disabled."""
+    if not create_linked_data:
+        return None
+    return (base_domain or "").rstrip("/")
+
+
+def _clean_machine(
+    machine: Dict,
+    include_disabled: bool,
+    url_base: Optional[str],
+    process_updated_at: Callable[[Optional[str]], Optional[str]],
+    process_created_at: Callable[[Optional[str]], Optional[str]],
+) -> Dict:
+    """
+    Clean a single machine record with already validated and resolved options.
+
+    Disabled machines must already have been filtered out by the caller when
+    `include_disabled` is False.
+
+    Used by clean_machine_record and, through functools.partial, by
+    clean_machines_data. Timestamp modes are passed as handler functions from
+    _TIMESTAMP_HANDLERS, and `url_base` is the base domain without trailing
+    slash, or None when no linked data URL should be created.
+    """
+    # Build the cleaned record in a single pass over the original fields,
+    # keeping their order
+    cleaned = {}
+    for key, value in machine.items():
+        # Remove ID and slug fields (slug is replaced by 'url' below)
+        if key == "id" or key == "slug":
+            continue
+
+        # Remove disabled field when keeping only enabled machines
+        if key == "disabled" and not include_disabled:
+            continue
+
+        if key == "description" or key == "spec":
+            # Clean HTML while keeping links
+            value = clean_html_keep_links(value)
+        elif key == "created_at":
+            value = process_created_at(value)
+            if value is None:
+                continue
+        elif key == "updated_at":
+            value = process_updated_at(value)
+            if value is None:
+                continue
+
+        cleaned[key] = value
+
+    # Convert slug to full URL and add as new field (see create_linked_data_uri)
+    if url_base is not None and "slug" in machine:
+        cleaned["url"] = f"{url_base}/{machine['slug'].lstrip('/')}"
+
+    return cleaned
+
+
 def clean_machine_record(
     machine: Dict,
     include_disabled: bool = True,
@@ -250,57 +272,13 @@ def clean_machine_record(
     if not include_disabled and machine.get("disabled", False):
         return None
 
-    # Create a copy to avoid modifying the original
-    cleaned = machine.copy()
-
-    # Remove ID field
-    if "id" in cleaned:
-        del cleaned["id"]
-
-    # Remove disabled field when keeping only enabled machines
-    if not include_disabled and "disabled" in cleaned:
-        del cleaned["disabled"]
-
-    # Handle slug field
-    if "slug" in cleaned:
-        if create_linked_data:
-            # Convert slug to full URL and add as new field
-            cleaned["url"] = create_linked_data_uri(cleaned["slug"], base_domain or "")
-            # Remove the slug field when creating linked data
-            del cleaned["slug"]
-        else:
-            # Remove slug field
-            del cleaned["slug"]
-
-    # Handle description field
-    if "description" in cleaned:
-        cleaned["description"] = clean_html_keep_links(cleaned["description"])
-
-    # Handle spec field
-    if "spec" in cleaned:
-        cleaned["spec"] = clean_html_keep_links(cleaned["spec"])
-
-    # Handle created_at field
-    if "created_at" in cleaned:
-        processed_value = process_timestamp_field(
-            cleaned["created_at"], created_at_mode
-        )
-        if processed_value is None:
-            del cleaned["created_at"]
-        else:
-            cleaned["created_at"] = processed_value
-
-    # Handle updated_at field
-    if "updated_at" in cleaned:
-        processed_value = process_timestamp_field(
-            cleaned["updated_at"], updated_at_mode
-        )
-        if processed_value is None:
-            del cleaned["updated_at"]
-        else:
-            cleaned["updated_at"] = processed_value
-
-    return cleaned
+    return _clean_machine(
+        machine,
+        include_disabled,
+        _linked_data_base(create_linked_data, base_domain),
+        _TIMESTAMP_HANDLERS.get(updated_at_mode, _keep_timestamp),
+        _TIMESTAMP_HANDLERS.get(created_at_mode, _keep_timestamp),
+    )
 
 
 def clean_machines_data(
@@ -318,6 +296,9 @@ def clean_machines_data(
     data_exported_at: Optional[str] = None,
     license: Optional[str] = None,
     timezone: Optional[str] = None,
+    workers: Optional[int] = None,
+    output_compression: Optional[Literal["gzip"]] = None,
+    compact: bool = False,
 ) -> Tuple[List[Dict], str]:
     """
     Clean machine data from an exported JSON file.
@@ -354,6 +335,12 @@ def clean_machines_data(
                          FabManager export format: *_DD_MM_YYYY_HH-MM.json
         license: License information for the cleaned dataset (optional, added to metadata)
         timezone: Timezone information, ISO 8601 format (e.g., 'UTC'), for timestamp fields (optional, added to metadata)
+        workers: Number of worker processes used to clean records (optional).
+                 If None or 1, records are cleaned in the current process
+        output_compression: Compression of the output file: None (default) or 'gzip'.
+                            Generated output filenames get a '.gz' extension
+        compact: If True, write compact JSON without indentation (default: False).
+                 Smaller and faster to write and parse, but harder to read
 
     Returns:
         Tuple of (cleaned_machines_list, output_filepath)
@@ -395,8 +382,7 @@ def clean_machines_data(
     if data_exported_at is None:
         data_exported_at = extract_timestamp_from_filename(input_path.name)
 
-    with open(input_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = load_json_file(input_path)
 
     # Extract machines array
     if isinstance(data, dict) and "machines" in data:
@@ -408,37 +394,51 @@ def clean_machines_data(
             "Input file must contain a 'machines' key or be a list of machines"
         )
 
+    # Filter out disabled machines before doing any cleaning work
+    if not include_disabled:
+        machines = [
+            machine for machine in machines if not machine.get("disabled", False)
+        ]
+
     # Clean each machine
-    cleaned_machines = []
-    for machine in machines:
-        cleaned = clean_machine_record(
-            machine=machine,
+    cleaned_machines = map_records(
+        partial(
+            _clean_machine,
             include_disabled=include_disabled,
-            create_linked_data=create_linked_data,
-            base_domain=base_domain,
-            updated_at_mode=updated_at_mode,
-            created_at_mode=created_at_mode,
-        )
-        if cleaned is not None:  # None means filtered out
-            cleaned_machines.append(cleaned)
+            url_base=_linked_data_base(create_linked_data, base_domain),
+            process_updated_at=_TIMESTAMP_HANDLERS.get(
+                updated_at_mode, _keep_timestamp
+            ),
+            process_created_at=_TIMESTAMP_HANDLERS.get(
+                created_at_mode, _keep_timestamp
+            ),
+        ),
+        machines,
+        workers,
+    )
+
+    # Single timestamp for the output filename and the metadata
+    cleaned_at = datetime.now()
 
     # Generate output filename if not provided
-    output_path: Union[str, Path]
+    output_path: Path
     if output_file is None:
-        timestamp = datetime.now().strftime("%d_%m_%Y_%H-%M")
+        extension = COMPRESSION_EXTENSIONS.get(output_compression or "", "")
+        timestamp = cleaned_at.strftime("%d_%m_%Y_%H-%M")
         suffix = "linked" if create_linked_data else "cleaned"
         output_path = (
-            input_path.parent / f"FabManager_Machines_Cleaned_{suffix}_{timestamp}.json"
+            input_path.parent
+            / f"FabManager_Machines_Cleaned_{suffix}_{timestamp}.json{extension}"
         )
     else:
         output_path = Path(output_file)
 
     # Ensure output directory exists
-    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
 
     # Build metadata - only include fields that are provided
     metadata = {
-        "data_cleaned_at": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+        "data_cleaned_at": cleaned_at.strftime("%Y-%m-%dT%H:%M:%S"),
     }
 
     # Add optional metadata fields if provided
@@ -460,8 +460,7 @@ def clean_machines_data(
     # Save cleaned data
     output_data = {"machines": cleaned_machines, "metadata": metadata}
 
-    with open(output_path, "w", encoding="utf-8", newline="\n") as f:
-        json.dump(output_data, f, indent=2, ensure_ascii=False)
+    write_json_file(output_data, output_path, output_compression, compact)
 
     return cleaned_machines, str(output_path)
 
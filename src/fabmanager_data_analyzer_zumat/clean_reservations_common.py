@@ -0,0 +1,343 @@
+"""
+Shared logic for cleaning reservation data from FabManager exports.
+
+Machine and training reservations come from the same export file and are cleaned
+the same way, except for the reservable type they keep and the slot information
+they extract. This module provides the common parts used by
+clean_reservations_machine and clean_reservations_training.
+"""
+
+import re
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, Literal, Optional, Tuple, Union
+
+from .utils import (
+    COMPRESSION_EXTENSIONS,
+    load_json_file,
+    map_records,
+    write_csv_file,
+    write_json_file,
+)
+
+# Timestamp in FabManager export filenames: DD_MM_YYYY_HH-MM
+_TIMESTAMP_RE = re.compile(r"(\d{2})_(\d{2})_(\d{4})_(\d{2})-(\d{2})")
+
+
+def extract_timestamp_from_filename(filename: str) -> Optional[str]:
+    """
+    Extract timestamp from FabManager export filename.
+
+    Expected format: FabManager_ExportedData_*_DD_MM_YYYY_HH-MM.json
+
+    Args:
+        filename: The filename to extract timestamp from
+
+    Returns:
+        ISO format timestamp string (YYYY-MM-DDTHH:MM) or None if not found
+
+    Example:
+        >>> extract_timestamp_from_filename('FabManager_ExportedData_Reservations_01_01_2025_00-00.json')
+        '2025-01-01T00:00'
+    """
+    match = _TIMESTAMP_RE.search(filename)
+
+    if match:
+        day, month, year, hour, minute = match.groups()
+        try:
+            # Convert to ISO format: YYYY-MM-DDTHH:MM
+            return f"{year}-{month}-{day}T{hour}:{minute}"
+        except ValueError:
+            return None
+
+    return None
+
+
+@lru_cache(maxsize=4096)
+def process_timestamp_field(
+    timestamp: Optional[str], mode: Literal["all", "only_date", "remove"]
+) -> Optional[str]:
+    """
+    Process timestamp field based on the specified mode.
+
+    Many reservations share the same timestamps (bulk imports, and every
+    reservation of a day in 'only_date' mode), so results are cached.
+
+    Args:
+        timestamp: ISO format timestamp string
+        mode: Processing mode - 'all' keeps full timestamp, 'only_date' keeps only date,
+              'remove' returns None
+
+    Returns:
+        Processed timestamp or None
+
+    Example:
+        >>> process_timestamp_field('2025-01-01T00:00:00Z', 'only_date')
+        '2025-01-01'
+    """
+    if mode == "remove" or not timestamp:
+        return None
+
+    if mode == "only_date":
+        # Extract only the date part (YYYY-MM-DD)
+        try:
+            return timestamp.split("T")[0]
+        except (IndexError, AttributeError):
+            return timestamp
+
+    # mode == 'all'
+    return timestamp
+
+
+@lru_cache(maxsize=1024)
+def _build_url(base_domain: str, slug: str) -> str:
+    """
+    Build the linked data URL of a reservable.
+
+    The same machines and trainings are booked over and over, so URLs are cached.
+    """
+    return f"{base_domain.rstrip('/')}/{slug.lstrip('/')}"
+
+
+def clean_reservation_fields(
+    reservation: Dict,
+    id_field: str,
+    url_field: str,
+    updated_at_mode: Literal["all", "only_date", "remove"] = "all",
+    created_at_mode: Literal["all", "only_date", "remove"] = "all",
+    create_linked_data: bool = False,
+    base_domain: Optional[str] = None,
+) -> Dict:
+    """
+    Clean the fields shared by all reservation types.
+
+    Keeps the timestamps, the user group name and a reference to the reserved
+    item. Validation and the reserved slots are left to the type-specific cleaner.
+
+    Args:
+        reservation: Reservation record to clean
+        id_field: Output field for the reservable id (e.g., 'machine_id')
+        url_field: Output field for the reservable URL (e.g., 'machine_url')
+        updated_at_mode: How to handle updated_at field ('all', 'only_date', 'remove')
+        created_at_mode: How to handle created_at field ('all', 'only_date', 'remove')
+        create_linked_data: If True, create the `url_field` field with full URL
+        base_domain: Base domain for creating linked data URLs (required if create_linked_data=True)
+
+    Returns:
+        Partially cleaned reservation record
+    """
+    # Start building cleaned record (without ID)
+    cleaned = {}
+
+    # Process timestamps
+    processed = process_timestamp_field(reservation.get("updated_at"), updated_at_mode)
+    if processed is not None:
+        cleaned["updated_at"] = processed
+
+    processed = process_timestamp_field(reservation.get("created_at"), created_at_mode)
+    if processed is not None:
+        cleaned["created_at"] = processed
+
+    # Extract user group name
+    group = (reservation.get("user") or {}).get("group") or {}
+    group_name = group.get("name")
+    if group_name:
+        cleaned["user_group"] = group_name
+
+    # Extract reservable information
+    reservable = reservation.get("reservable") or {}
+    reservable_id = reservable.get("id")
+    if reservable_id:
+        cleaned[id_field] = reservable_id
+
+        # Create linked data URL if requested
+        slug = reservable.get("slug")
+        if create_linked_data and base_domain and slug:
+            cleaned[url_field] = _build_url(base_domain, slug)
+
+    return cleaned
+
+
+def metadata_file_path(output_path: Union[str, Path]) -> Path:
+    """
+    Return the path of the metadata file written next to a CSV output file.
+
+    Example:
+        >>> metadata_file_path('reservations.csv.gz')
+        PosixPath('reservations.metadata.json')
+    """
+    path = Path(output_path)
+    while path.suffix in (".csv", *COMPRESSION_EXTENSIONS.values()):
+        path = path.with_suffix("")
+    return path.with_name(f"{path.name}.metadata.json")
+
+
+def clean_reservations_data(
+    input_file: str,
+    clean_record: Callable[[Dict], Optional[Dict]],
+    reservable_type: str,
+    output_file: Optional[str] = None,
+    create_linked_data: bool = False,
+    base_domain: Optional[str] = None,
+    data_owner: Optional[str] = None,
+    data_steward: Optional[str] = None,
+    data_curator: Optional[str] = None,
+    data_exported_from: Optional[str] = None,
+    data_exported_at: Optional[str] = None,
+    license: Optional[str] = None,
+    timezone: Optional[str] = None,
+    workers: Optional[int] = None,
+    output_format: Literal["json", "csv"] = "json",
+    output_compression: Optional[Literal["gzip"]] = None,
+    compact: bool = False,
+) -> Tuple[List[Dict], str]:
+    """
+    Clean the reservations of one type from a FabManager reservation export.
+
+    Reads the export, cleans every reservation of `reservable_type` with
+    `clean_record` (which returns None for invalid reservations) and writes the
+    result with its metadata.
+
+    Args:
+        input_file: Path to the input JSON file
+        clean_record: Picklable function cleaning a single reservation record
+        reservable_type: Reservable type of the reservations to keep, also used in
+                         generated output filenames (e.g., 'Machine')
+        output_file: Path for the output file. If None, generates automatic name
+        create_linked_data: Whether linked data URLs are created
+        base_domain: Base domain for linked data URLs. Required when
+                     create_linked_data=True
+        data_owner: Organization or person who owns the data (optional, added to metadata)
+        data_steward: Person responsible for data quality (optional, added to metadata)
+        data_curator: Person who prepared/cleaned the data (optional, added to metadata)
+        data_exported_from: URL where data was exported from (optional, added to metadata)
+        data_exported_at: Date and time when the original data was exported (optional, added to metadata).
+                         If not provided, automatically extracted from input filename
+        license: License under which the data is published (optional, added to metadata)
+        timezone: Timezone information for timestamp fields (optional, added to metadata)
+        workers: Number of worker processes used to clean records (optional)
+        output_format: Format of the output file: 'json' (default) or 'csv'. CSV
+                       metadata is written to a separate JSON file
+                       (see metadata_file_path)
+        output_compression: Compression of the output file: None (default) or 'gzip'
+        compact: If True, write compact JSON without indentation
+
+    Returns:
+        Tuple of (list of cleaned reservation records, path to output file)
+
+    Raises:
+        FileNotFoundError: If input file doesn't exist
+        ValueError: If create_linked_data=True but base_domain is not provided,
+                    if output_format is invalid or if the input file has no reservations
+        json.JSONDecodeError: If input file is not valid JSON
+    """
+    # Convert to Path objects
+    input_path = Path(input_file)
+
+    # Extract timestamp from filename if data_exported_at not provided
+    if data_exported_at is None:
+        data_exported_at = extract_timestamp_from_filename(input_path.name)
+
+    # Check if input file exists
+    if not input_path.exists():
+        raise FileNotFoundError(f"Input file not found: {input_file}")
+
+    # Validate base_domain requirement
+    if create_linked_data and not base_domain:
+        raise ValueError("base_domain is required when create_linked_data=True")
+
+    if output_format not in ("json", "csv"):
+        raise ValueError(
+            f"Invalid output_format: {output_format!r}. Expected 'json' or 'csv'"
+        )
+
+    # Read input file
+    data = load_json_file(input_path)
+
+    # Extract reservations array
+    if isinstance(data, dict) and "reservations" in data:
+        reservations = data["reservations"]
+    elif isinstance(data, list):
+        reservations = data
+    else:
+        raise ValueError(
+            "Input file must contain a 'reservations' key or be a list of reservations"
+        )
+
+    # Skip reservations of other types before cleaning, so they are neither
+    # passed to clean_record nor sent to worker processes
+    reservations = [
+        reservation
+        for reservation in reservations
+        if reservation.get("reservable_type") == reservable_type
+    ]
+
+    # Clean each reservation record
+    cleaned_reservations = map_records(clean_record, reservations, workers)
+
+    # Single timestamp for the output filename and the metadata
+    cleaned_at = datetime.now()
+
+    # Generate output filename if not provided
+    output_path: Union[str, Path]
+    if output_file is None:
+        extension = COMPRESSION_EXTENSIONS.get(output_compression or "", "")
+        timestamp = cleaned_at.strftime("%d_%m_%Y_%H-%M")
+        suffix = "linked" if create_linked_data else "cleaned"
+        output_path = (
+            input_path.parent
+            / f"FabManager_Reservations_{reservable_type}_Cleaned_{suffix}_{timestamp}.{output_format}{extension}"
+        )
+    else:
+        output_path = Path(output_file)
+
+    # Ensure output directory exists
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+
+    # Prepare output data structure
+    output_data: Dict = {"reservations": cleaned_reservations}
+
+    # Add metadata if any optional fields are provided
+    metadata = {}
+
+    # Add cleaning timestamp
+    metadata["data_cleaned_at"] = cleaned_at.strftime("%Y-%m-%dT%H:%M:%S")
+
+    if data_owner is not None:
+        metadata["data_owner"] = data_owner
+    if data_steward is not None:
+        metadata["data_steward"] = data_steward
+    if data_curator is not None:
+        metadata["data_curator"] = data_curator
+    if data_exported_from is not None:
+        metadata["data_exported_from"] = data_exported_from
+    if data_exported_at is not None:
+        metadata["data_exported_at"] = data_exported_at
+    if license is not None:
+        metadata["license"] = license
+    if timezone is not None:
+        metadata["timezone"] = timezone
+
+    if metadata:
+        output_data["metadata"] = metadata
+
+    # Write output file
+    if output_format == "csv":
+        write_csv_file(cleaned_reservations, output_path, output_compression)
+        write_json_file(
+            {"metadata": output_data["metadata"]}, metadata_file_path(output_path)
+        )
+    else:
+        write_json_file(output_data, output_path, output_compression, compact)
+
+    return cleaned_reservations, str(output_path)
+
+
+__all__ = [
+    "clean_reservations_data",
+    "clean_reservation_fields",
+    "metadata_file_path",
+    "process_timestamp_field",
+    "extract_timestamp_from_filename",
+]
@@ -6,12 +6,18 @@ as Open Data. It offers various cleaning options including filtering disabled tr
 creating linked data, handling timestamps, and cleaning HTML content.
 """
 
-import json
 import re
 from datetime import datetime
-from html.parser import HTMLParser
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Literal, Optional, Tuple, Union
+from typing import Callable, Dict, List, Literal, Optional, Tuple, Union
+
+from .utils import COMPRESSION_EXTENSIONS
+from .utils import clean_html_keep_links as _clean_html_keep_links
+from .utils import load_json_file, map_records, write_json_file
+
+# Timestamp in FabManager export filenames: DD_MM_YYYY_HH-MM
+_TIMESTAMP_RE = re.compile(r"(\d{2})_(\d{2})_(\d{4})_(\d{2})-(\d{2})")
 
 
 def extract_timestamp_from_filename(filename: str) -> Optional[str]:
@@ -30,9 +36,7 @@ def extract_timestamp_from_filename(filename: str) -> Optional[str]:
         >>> extract_timestamp_from_filename('FabManager_ExportedData_Trainings_01_01_2025_00-00.json')
         '2025-01-01T00:00'
     """
-    # Pattern: DD_MM_YYYY_HH-MM
-    pattern = r"(\d{2})_(\d{2})_(\d{4})_(\d{2})-(\d{2})"
-    match = re.search(pattern, filename)
+    match = _TIMESTAMP_RE.search(filename)
 
     if match:
         day, month, year, hour, minute = match.groups()
@@ -45,59 +49,13 @@ def extract_timestamp_from_filename(filename: str) -> Optional[str]:
     return None
 
 
-class HTMLLinkExtractor(HTMLParser):
-    """
-    Custom HTML parser to extract text while preserving external links.
-
-    This parser removes all HTML tags but keeps external links in a readable format,
-    converting <a href="url">text</a> to "text (url)".
-    """
-
-    def __init__(self):
-        super().__init__()
-        self.result = []
-        self.current_link = None
-        self.current_text = []
-
-    def handle_starttag(self, tag, attrs):
-        """Handle opening tags, capturing link URLs."""
-        if tag == "a":
-            # Extract href attribute
-            for attr_name, attr_value in attrs:
-                if attr_name == "href":
-                    self.current_link = attr_value
-                    break
-
-    def handle_endtag(self, tag):
-        """Handle closing tags, formatting links."""
-        if tag == "a" and self.current_link:
-            # Add the link in format: text (url)
-            link_text = "".join(self.current_text).strip()
-            if link_text:
-                self.result.append(f"{link_text} ({self.current_link})")
-            self.current_link = None
-            self.current_text = []
-
-    def handle_data(self, data):
-        """Handle text content."""
-        if self.current_link is not None:
-            # We're inside a link, collect the text
-            self.current_text.append(data)
-        else:
-            # Regular text, add it directly
-            self.result.append(data)
-
-    def get_text(self):
-        """Get the cleaned text with preserved links."""
-        return "".join(self.result).strip()
-
-
 def clean_html_keep_links(html_content: Optional[str]) -> str:
     """
     Clean HTML content while preserving external links.
 
     Removes all HTML tags but converts links to a readable format:
-    <a href="https://example.com">Click here</a> becomes "Click here (https://example.com)"
+    <a href="https://example.com">Click here</a> becomes "Click here (https://example.com)".
+    Whitespace inside the text is kept as is.
 
     Args:
         html_content: HTML string to clean
@@ -109,16 +67,37 @@ def clean_html_keep_links(html_content: Optional[str]) -> str:
         >>> clean_html_keep_links('<p>Visit <a href="https://example.com">our site</a></p>')
         'Visit our site (https://example.com)'
     """
-    if not html_content:
-        return ""
+    return _clean_html_keep_links(html_content, collapse_whitespace=False)
+
+
+def _keep_timestamp(value: Optional[str]) -> Optional[str]:
+    """Timestamp handler for mode 'all': keep the full timestamp, drop empty ones."""
+    return value or None
+
 
-    parser = HTMLLinkExtractor()
+def _keep_date_only(value: Optional[str]) -> Optional[str]:
+    """Timestamp handler for mode 'only_date': keep only the date part."""
+    if not value:
+        return None
+    # Extract only the date part (YYYY-MM-DD)
     try:
-        parser.feed(html_content)
-        return str(parser.get_text())
-    except Exception:
-        # If parsing fails, just strip all tags
-        return re.sub(r"<[^>]+>", "", html_content).strip()
+        return value.split("T")[0]
+    except (IndexError, AttributeError):
+        return value
+
+
+def _remove_timestamp(value: Optional[str]) -> None:
+    """Timestamp handler for mode 'remove': drop the field."""
+    return None
+
+
+# Timestamp handler for each processing mode. The mode is resolved once per
+# cleaning run instead of once per field.
+_TIMESTAMP_HANDLERS: Dict[str, Callable[[Optional[str]], Optional[str]]] = {
+    "all": _keep_timestamp,
+    "only_date": _keep_date_only,
+    "remove": _remove_timestamp,
+}
 
 
 def process_timestamp_field(
@@ -135,18 +114,7 @@ def process_timestamp_field(
     Returns:
         Processed timestamp or None
     """
-    if mode == "remove" or not timestamp:
-        return None
-
-    if mode == "only_date":
-        # Extract only the date part (YYYY-MM-DD)
-        try:
-            return timestamp.split("T")[0]
-        except (IndexError, AttributeError):
-            return timestamp
-
-    # mode == 'all'
-    return timestamp
+    return _TIMESTAMP_HANDLERS.get(mode, _keep_timestamp)(timestamp)
 
 
 def create_linked_data_uri(base_domain: str, slug: str) -> str:
@@ -172,6 +140,77 @@ def create_linked_data_uri(base_domain: str, slug: str) -> str:
     return f"{base_domain}/{slug}"
 
 
+def _linked_data_base(
+    create_linked_data: bool, base_domain: Optional[str]
+) -> Optional[str]:
+    """Return the normalized base for linked data URLs, or None if disabled."""
+    if not create_linked_data:
+        return None
+    return (base_domain or "").rstrip("/")
+
+
+def _clean_training(
+    training: Dict,
+    include_disabled: bool,
+    url_base: Optional[str],
+    process_updated_at: Callable[[Optional[str]], Optional[str]],
+    process_created_at: Callable[[Optional[str]], Optional[str]],
+    include_nb_total_places: bool,
+) -> Dict:
+    """
+    Clean a single training record with already validated and resolved options.
+
+    Disabled trainings must already have been filtered out by the caller when
+    `include_disabled` is False.
+
+    Used by clean_training_record and, through functools.partial, by
+    clean_trainings_data. Timestamp modes are passed as handler functions from
+    _TIMESTAMP_HANDLERS, and `url_base` is the base domain without trailing
+    slash, or None when no linked data URL should be created.
+    """
+    # Build the cleaned record in a single pass over the original fields,
+    # keeping their order
+    cleaned = {}
+    for key, value in training.items():
+        # Remove ID field
+        if key == "id":
+            continue
+
+        # Remove disabled field when filtering (only keep enabled trainings without the field)
+        if key == "disabled" and not include_disabled:
+            continue
+
+        # Remove slug field when creating linked data (replaced by 'url' below)
+        if key == "slug" and url_base is not None:
+            continue
+
+        # Handle nb_total_places field
+        if key == "nb_total_places" and not include_nb_total_places:
+            continue
+
+        if key == "description":
+            # Clean HTML in description field
+            if value:
+                value = clean_html_keep_links(value)
+        elif key == "updated_at":
+            value = process_updated_at(value)
+            if value is None:
+                continue
+        elif key == "created_at":
+            value = process_created_at(value)
+            if value is None:
+                continue
+
+        cleaned[key] = value
+
+    # Create linked data URI if requested (see create_linked_data_uri)
+    slug = training.get("slug")
+    if url_base is not None and slug:
+        cleaned["url"] = f"{url_base}/{slug.lstrip('/')}"
+
+    return cleaned
+
+
 def clean_training_record(
     training: Dict,
     include_disabled: bool = True,
@@ -200,53 +239,17 @@ def clean_training_record(
     if not include_disabled and training.get("disabled") is not None:
         return None
 
-    # Create a copy to avoid modifying the original
-    cleaned = training.copy()
-
-    # Remove ID field
-    if "id" in cleaned:
-        del cleaned["id"]
+    if create_linked_data and not base_domain:
+        raise ValueError("base_domain is required when create_linked_data=True")
 
-    # Remove disabled field when filtering (only keep enabled trainings without the field)
-    if not include_disabled:
-        cleaned.pop("disabled", None)
-
-    # Create linked data URI if requested
-    if create_linked_data:
-        if not base_domain:
-            raise ValueError("base_domain is required when create_linked_data=True")
-
-        slug = cleaned.get("slug")
-        if slug:
-            cleaned["url"] = create_linked_data_uri(base_domain, slug)
-
-        # Remove slug field when creating linked data
-        cleaned.pop("slug", None)
-
-    # Process timestamp fields
-    if "updated_at" in cleaned:
-        processed = process_timestamp_field(cleaned["updated_at"], updated_at_mode)
-        if processed is None:
-            cleaned.pop("updated_at", None)
-        else:
-            cleaned["updated_at"] = processed
-
-    if "created_at" in cleaned:
-        processed = process_timestamp_field(cleaned["created_at"], created_at_mode)
-        if processed is None:
-            cleaned.pop("created_at", None)
-        else:
-            cleaned["created_at"] = processed
-
-    # Clean HTML in description field
-    if "description" in cleaned and cleaned["description"]:
-        cleaned["description"] = clean_html_keep_links(cleaned["description"])
-
-    # Handle nb_total_places field
-    if not include_nb_total_places:
-        cleaned.pop("nb_total_places", None)
-
-    return cleaned
+    return _clean_training(
+        training,
+        include_disabled,
+        _linked_data_base(create_linked_data, base_domain),
+        _TIMESTAMP_HANDLERS.get(updated_at_mode, _keep_timestamp),
+        _TIMESTAMP_HANDLERS.get(created_at_mode, _keep_timestamp),
+        include_nb_total_places,
+    )
 
 
 def clean_trainings_data(
@@ -265,6 +268,9 @@ def clean_trainings_data(
     data_exported_at: Optional[str] = None,
     license: Optional[str] = None,
     timezone: Optional[str] = None,
+    workers: Optional[int] = None,
+    output_compression: Optional[Literal["gzip"]] = None,
+    compact: bool = False,
 ) -> Tuple[List[Dict], str]:
     """
     Clean and transform training data from FabManager export.
@@ -296,6 +302,12 @@ def clean_trainings_data(
                          the FabManager export format: *_DD_MM_YYYY_HH-MM.json
         license: License under which the data is published (optional, added to metadata)
         timezone: Timezone information, ISO 8601 format (e.g., 'UTC'), for timestamp fields (optional, added to metadata)
+        workers: Number of worker processes used to clean records (optional).
+                 If None or 1, records are cleaned in the current process
+        output_compression: Compression of the output file: None (default) or 'gzip'.
+                            Generated output filenames get a '.gz' extension
+        compact: If True, write compact JSON without indentation (default: False).
+                 Smaller and faster to write and parse, but harder to read
 
     Returns:
         Tuple of (list of cleaned training records, path to output file)
@@ -338,35 +350,47 @@ def clean_trainings_data(
         raise ValueError("base_domain is required when create_linked_data=True")
 
     # Read input file
-    with open(input_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = load_json_file(input_path)
 
     # Extract trainings array
     trainings = data.get("trainings", [])
 
+    # Filter out disabled trainings before doing any cleaning work
+    if not include_disabled:
+        trainings = [
+            training for training in trainings if training.get("disabled") is None
+        ]
+
     # Clean each training record
-    cleaned_trainings = []
-    for training in trainings:
-        cleaned = clean_training_record(
-            training=training,
+    cleaned_trainings = map_records(
+        partial(
+            _clean_training,
             include_disabled=include_disabled,
-            create_linked_data=create_linked_data,
-            base_domain=base_domain,
-            updated_at_mode=updated_at_mode,
-            created_at_mode=created_at_mode,
+            url_base=_linked_data_base(create_linked_data, base_domain),
+            process_updated_at=_TIMESTAMP_HANDLERS.get(
+                updated_at_mode, _keep_timestamp
+            ),
+            process_created_at=_TIMESTAMP_HANDLERS.get(
+                created_at_mode, _keep_timestamp
+            ),
             include_nb_total_places=include_nb_total_places,
-        )
-        if cleaned is not None:
-            cleaned_trainings.append(cleaned)
+        ),
+        trainings,
+        workers,
+    )
+
+    # Single timestamp for the output filename and the metadata
+    cleaned_at = datetime.now()
 
     # Generate output filename if not provided
     output_path: Union[str, Path]
     if output_file is None:
-        timestamp = datetime.now().strftime("%d_%m_%Y_%H-%M")
+        extension = COMPRESSION_EXTENSIONS.get(output_compression or "", "")
+        timestamp = cleaned_at.strftime("%d_%m_%Y_%H-%M")
         suffix = "linked" if create_linked_data else "cleaned"
         output_path = (
             input_path.parent
-            / f"FabManager_Trainings_Cleaned_{suffix}_{timestamp}.json"
+            / f"FabManager_Trainings_Cleaned_{suffix}_{timestamp}.json{extension}"
         )
     else:
         output_path = Path(output_file)
@@ -381,7 +405,7 @@ def clean_trainings_data(
     metadata = {}
 
     # Add cleaning timestamp
-    metadata["data_cleaned_at"] = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+    metadata["data_cleaned_at"] = cleaned_at.strftime("%Y-%m-%dT%H:%M:%S")
 
     if data_owner is not None:
         metadata["data_owner"] = data_owner
@@ -402,7 +426,6 @@ def clean_trainings_data(
         output_data["metadata"] = metadata
 
     # Write output file
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(output_data, f, indent=2, ensure_ascii=False)
+    write_json_file(output_data, output_path, output_compression, compact)
 
     return cleaned_trainings, str(output_path)
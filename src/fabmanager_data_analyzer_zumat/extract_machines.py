@@ -4,14 +4,12 @@ Machine Data Extraction Module
 This module provides functionality to extract machine data from the FabManager Open API.
 """
 
-import json
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Literal, Optional, Union
 
-from .api_client import FabManagerAPIClient
-from .utils import clean_data_for_json
+from .utils import COMPRESSION_EXTENSIONS, write_json_file
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +20,8 @@ def extract_machines(
     per_page: int = 100,
     max_pages: Optional[int] = None,
     show_progress: bool = True,
+    concurrency: int = 4,
+    cache_dir: Optional[Union[str, Path]] = None,
 ) -> List[Dict]:
     """
     Extract all machine data from FabManager.
@@ -32,6 +32,10 @@ def extract_machines(
         per_page: Number of items per page (default: 100)
         max_pages: Maximum number of pages to fetch (default: None, fetch all)
         show_progress: Whether to show progress in console (default: True)
+        concurrency: Maximum number of pages fetched at the same time (default: 4)
+        cache_dir: Directory where fetched pages are cached and revalidated with
+                   conditional requests on the next run (default: None, no cache).
+                   The cache holds raw API responses, personal data included
 
     Returns:
         List of machine records
@@ -45,7 +49,10 @@ def extract_machines(
     """
     logger.info("Starting machine data extraction")
 
-    client = FabManagerAPIClient(base_url=base_url, api_token=api_token)
+    # Imported here so that importing the package does not load requests
+    from .api_client import _get_client
+
+    client = _get_client(base_url, api_token, cache_dir)
 
     machines = client.fetch_all_as_list(
         endpoint="/open_api/v1/machines",
@@ -53,6 +60,7 @@ def extract_machines(
         per_page=per_page,
         max_pages=max_pages,
         show_progress=show_progress,
+        concurrency=concurrency,
     )
 
     logger.info(f"Successfully extracted {len(machines)} machines")
@@ -63,6 +71,8 @@ def save_machines(
     machines: List[Dict],
     output_path: Optional[Union[str, Path]] = None,
     add_timestamp: bool = True,
+    output_compression: Optional[Literal["gzip"]] = None,
+    skip_unchanged: bool = False,
 ) -> str:
     """
     Save machine data to a JSON file.
@@ -71,6 +81,12 @@ def save_machines(
         machines: List of machine records to save
         output_path: Path to save the file. If None, saves to current directory
         add_timestamp: Whether to add timestamp to filename (default: True)
+        output_compression: Compression of the output file: None (default) or 'gzip'.
+                            Generated filenames get a '.gz' extension
+        skip_unchanged: Whether to leave an existing file untouched when it already
+                        holds exactly this content, keeping its modification time
+                        (default: False). The comparison serializes the whole
+                        document in memory
 
     Returns:
         Path to the saved file
@@ -94,27 +110,32 @@ def save_machines(
         output_dir.mkdir(parents=True, exist_ok=True)
 
         # Generate filename
+        extension = COMPRESSION_EXTENSIONS.get(output_compression or "", "")
         if add_timestamp:
             timestamp = datetime.now().strftime("%d_%m_%Y_%H-%M")
-            filename = f"FabManager_ExportedData_Machines_{timestamp}.json"
+            filename = f"FabManager_ExportedData_Machines_{timestamp}.json{extension}"
         else:
-            filename = "FabManager_ExportedData_Machines.json"
+            filename = f"FabManager_ExportedData_Machines.json{extension}"
 
         filepath = output_dir / filename
 
-    # Clean data to remove unusual line terminators
-    logger.info("Cleaning data for JSON export")
-    cleaned_data = clean_data_for_json(machines)
-
     # Prepare output data
-    output_data = {"machines": cleaned_data}
+    output_data = {"machines": machines}
 
-    # Save to file
+    # Save to file, removing unusual line terminators while serializing
     logger.info(f"Saving {len(machines)} machines to {filepath}")
-    with open(filepath, "w", encoding="utf-8", newline="\n") as f:
-        json.dump(output_data, f, indent=2, ensure_ascii=False)
+    written = write_json_file(
+        output_data,
+        filepath,
+        output_compression,
+        clean_line_terminators=True,
+        skip_unchanged=skip_unchanged,
+    )
 
-    logger.info(f"Successfully saved machines to {filepath}")
+    if written:
+        logger.info(f"Successfully saved machines to {filepath}")
+    else:
+        logger.info(f"{filepath} is already up to date, skipped writing")
     return str(filepath)
 
 
@@ -126,6 +147,10 @@ def extract_and_save_machines(
     max_pages: Optional[int] = None,
     add_timestamp: bool = True,
     show_progress: bool = True,
+    concurrency: int = 4,
+    cache_dir: Optional[Union[str, Path]] = None,
+    output_compression: Optional[Literal["gzip"]] = None,
+    skip_unchanged: bool = False,
 ) -> tuple[List[Dict], str]:
     """
     Extract machine data and save it to a file in one operation.
@@ -138,6 +163,16 @@ def extract_and_save_machines(
         max_pages: Maximum number of pages to fetch (default: None)
         add_timestamp: Whether to add timestamp to filename (default: True)
         show_progress: Whether to show progress in console (default: True)
+        concurrency: Maximum number of pages fetched at the same time (default: 4)
+        cache_dir: Directory where fetched pages are cached and revalidated with
+                   conditional requests on the next run (default: None, no cache).
+                   The cache holds raw API responses, personal data included
+        output_compression: Compression of the output file: None (default) or 'gzip'.
+                            Generated filenames get a '.gz' extension
+        skip_unchanged: Whether to leave an existing file untouched when it already
+                        holds exactly this content, keeping its modification time
+                        (default: False). The comparison serializes the whole
+                        document in memory
 
     Returns:
         Tuple of (machines list, filepath)
@@ -159,6 +194,8 @@ def extract_and_save_machines(
         per_page=per_page,
         max_pages=max_pages,
         show_progress=show_progress,
+        concurrency=concurrency,
+        cache_dir=cache_dir,
     )
 
     # Save machines
@@ -166,7 +203,11 @@ def extract_and_save_machines(
         print("Saving data...", end="", flush=True)
 
     filepath = save_machines(
-        machines=machines, output_path=output_path, add_timestamp=add_timestamp
+        machines=machines,
+        output_path=output_path,
+        add_timestamp=add_timestamp,
+        output_compression=output_compression,
+        skip_unchanged=skip_unchanged,
     )
 
     if show_progress:
@@ -5,15 +5,14 @@ This module provides functionality to extract reservation data from the FabManag
 Includes functionality to divide reservations by type (Machine, Training, Event).
 """
 
-import json
 import logging
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Literal, Optional, Union
 
-from .api_client import FabManagerAPIClient
-from .utils import clean_data_for_json, sanitize_filename
+from .utils import COMPRESSION_EXTENSIONS, sanitize_filename, write_json_file
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +23,8 @@ def extract_reservations(
     per_page: int = 100,
     max_pages: Optional[int] = None,
     show_progress: bool = True,
+    concurrency: int = 4,
+    cache_dir: Optional[Union[str, Path]] = None,
 ) -> List[Dict]:
     """
     Extract all reservation data from FabManager.
@@ -34,6 +35,10 @@ def extract_reservations(
         per_page: Number of items per page (default: 100)
         max_pages: Maximum number of pages to fetch (default: None, fetch all)
         show_progress: Whether to show progress in console (default: True)
+        concurrency: Maximum number of pages fetched at the same time (default: 4)
+        cache_dir: Directory where fetched pages are cached and revalidated with
+                   conditional requests on the next run (default: None, no cache).
+                   The cache holds raw API responses, personal data included
 
     Returns:
         List of reservation records
@@ -47,7 +52,10 @@ def extract_reservations(
     """
     logger.info("Starting reservation data extraction")
 
-    client = FabManagerAPIClient(base_url=base_url, api_token=api_token)
+    # Imported here so that importing the package does not load requests
+    from .api_client import _get_client
+
+    client = _get_client(base_url, api_token, cache_dir)
 
     reservations = client.fetch_all_as_list(
         endpoint="/open_api/v1/reservations",
@@ -55,6 +63,7 @@ def extract_reservations(
         per_page=per_page,
         max_pages=max_pages,
         show_progress=show_progress,
+        concurrency=concurrency,
     )
 
     logger.info(f"Successfully extracted {len(reservations)} reservations")
@@ -100,6 +109,8 @@ def save_reservations(
     output_path: Optional[Union[str, Path]] = None,
     add_timestamp: bool = True,
     divide_by_type: bool = False,
+    output_compression: Optional[Literal["gzip"]] = None,
+    skip_unchanged: bool = False,
 ) -> Union[str, Dict[str, str]]:
     """
     Save reservation data to JSON file(s).
@@ -109,6 +120,12 @@ def save_reservations(
         output_path: Path to save the file(s). If None, saves to current directory
         add_timestamp: Whether to add timestamp to filename (default: True)
         divide_by_type: Whether to divide reservations by type into separate files (default: False)
+        output_compression: Compression of the output file: None (default) or 'gzip'.
+                            Generated filenames get a '.gz' extension
+        skip_unchanged: Whether to leave an existing file untouched when it already
+                        holds exactly this content, keeping its modification time
+                        (default: False). The comparison serializes the whole
+                        document in memory
 
     Returns:
         If divide_by_type is False: Path to the saved file (str)
@@ -129,14 +146,22 @@ def save_reservations(
 
     if divide_by_type:
         # Divide and save by type
-        return _save_reservations_divided(reservations, output_dir, add_timestamp)
+        return _save_reservations_divided(
+            reservations, output_dir, add_timestamp, output_compression, skip_unchanged
+        )
     else:
         # Save all together
-        return _save_reservations_combined(reservations, output_dir, add_timestamp)
+        return _save_reservations_combined(
+            reservations, output_dir, add_timestamp, output_compression, skip_unchanged
+        )
 
 
 def _save_reservations_combined(
-    reservations: List[Dict], output_dir: Path, add_timestamp: bool
+    reservations: List[Dict],
+    output_dir: Path,
+    add_timestamp: bool,
+    output_compression: Optional[str] = None,
+    skip_unchanged: bool = False,
 ) -> str:
     """
     Save all reservations to a single JSON file.
@@ -145,6 +170,8 @@ def _save_reservations_combined(
         reservations: List of reservation records
         output_dir: Directory to save the file
         add_timestamp: Whether to add timestamp to filename
+        output_compression: Compression of the output file: None or 'gzip'
+        skip_unchanged: Whether to leave files already holding this content untouched
 
     Returns:
         Path to the saved file
@@ -157,32 +184,43 @@ def _save_reservations_combined(
         output_dir.mkdir(parents=True, exist_ok=True)
 
         # Generate filename
+        extension = COMPRESSION_EXTENSIONS.get(output_compression or "", "")
         if add_timestamp:
             timestamp = datetime.now().strftime("%d_%m_%Y_%H-%M")
-            filename = f"FabManager_ExportedData_Reservations_{timestamp}.json"
+            filename = (
+                f"FabManager_ExportedData_Reservations_{timestamp}.json{extension}"
+            )
         else:
-            filename = "FabManager_ExportedData_Reservations.json"
+            filename = f"FabManager_ExportedData_Reservations.json{extension}"
 
         filepath = output_dir / filename
 
-    # Clean data to remove unusual line terminators
-    logger.info("Cleaning data for JSON export")
-    cleaned_data = clean_data_for_json(reservations)
-
     # Prepare output data
-    output_data = {"reservations": cleaned_data}
+    output_data = {"reservations": reservations}
 
-    # Save to file
+    # Save to file, removing unusual line terminators while serializing
     logger.info(f"Saving {len(reservations)} reservations to {filepath}")
-    with open(filepath, "w", encoding="utf-8", newline="\n") as f:
-        json.dump(output_data, f, indent=2, ensure_ascii=False)
+    written = write_json_file(
+        output_data,
+        filepath,
+        output_compression,
+        clean_line_terminators=True,
+        skip_unchanged=skip_unchanged,
+    )
 
-    logger.info(f"Successfully saved reservations to {filepath}")
+    if written:
+        logger.info(f"Successfully saved reservations to {filepath}")
+    else:
+        logger.info(f"{filepath} is already up to date, skipped writing")
     return str(filepath)
 
 
 def _save_reservations_divided(
-    reservations: List[Dict], output_dir: Path, add_timestamp: bool
+    reservations: List[Dict],
+    output_dir: Path,
+    add_timestamp: bool,
+    output_compression: Optional[str] = None,
+    skip_unchanged: bool = False,
 ) -> Dict[str, str]:
     """
     Save reservations divided by type to separate JSON files.
@@ -191,6 +229,8 @@ def _save_reservations_divided(
         reservations: List of reservation records
         output_dir: Directory to save the files
         add_timestamp: Whether to add timestamp to filenames
+        output_compression: Compression of the output files: None or 'gzip'
+        skip_unchanged: Whether to leave files already holding this content untouched
 
     Returns:
         Dictionary mapping reservation types to file paths
@@ -203,34 +243,44 @@ def _save_reservations_divided(
 
     # Generate timestamp for the files
     timestamp = datetime.now().strftime("%d_%m_%Y_%H-%M")
+    extension = COMPRESSION_EXTENSIONS.get(output_compression or "", "")
 
-    # Save each type as a separate file
+    # Save each type as a separate file. The files are independent, so they are
+    # written in parallel threads, which overlap the disk writes
     filepaths = {}
-    for rtype, items in groups.items():
-        # Generate filename
-        if add_timestamp:
-            filename = f"FabManager_ExportedData_Reservations_{sanitize_filename(rtype)}_{timestamp}.json"
-        else:
-            filename = (
-                f"FabManager_ExportedData_Reservations_{sanitize_filename(rtype)}.json"
+    with ThreadPoolExecutor(max_workers=max(1, len(groups))) as executor:
+        saving = []
+        for rtype, items in groups.items():
+            # Generate filename
+            if add_timestamp:
+                filename = f"FabManager_ExportedData_Reservations_{sanitize_filename(rtype)}_{timestamp}.json{extension}"
+            else:
+                filename = f"FabManager_ExportedData_Reservations_{sanitize_filename(rtype)}.json{extension}"
+
+            filepath = output_dir / filename
+
+            # Prepare output data
+            output_data = {"reservations": items}
+
+            # Save to file, removing unusual line terminators while serializing
+            logger.info(f"Saving {len(items)} {rtype} reservations to {filename}")
+            future = executor.submit(
+                write_json_file,
+                output_data,
+                filepath,
+                output_compression,
+                clean_line_terminators=True,
+                skip_unchanged=skip_unchanged,
             )
+            saving.append((rtype, len(items), filepath, future))
 
-        filepath = output_dir / filename
-
-        # Clean data before saving
-        logger.info(f"Cleaning {rtype} reservation data for JSON export")
-        cleaned_items = clean_data_for_json(items)
-
-        # Prepare output data
-        output_data = {"reservations": cleaned_items}
-
-        # Save to file
-        logger.info(f"Saving {len(items)} {rtype} reservations to {filename}")
-        with open(filepath, "w", encoding="utf-8", newline="\n") as f:
-            json.dump(output_data, f, indent=2, ensure_ascii=False)
-
-        filepaths[rtype] = str(filepath)
-        logger.info(f"  - {rtype}: {len(items)} items saved to {filename}")
+        for rtype, count, filepath, future in saving:
+            written = future.result()
+            filepaths[rtype] = str(filepath)
+            if written:
+                logger.info(f"  - {rtype}: {count} items saved to {filepath.name}")
+            else:
+                logger.info(f"  - {rtype}: {filepath.name} is already up to date")
 
     logger.info(f"Successfully created {len(groups)} reservation files by type")
     return filepaths
@@ -245,6 +295,10 @@ def extract_and_save_reservations(
     add_timestamp: bool = True,
     divide_by_type: bool = False,
     show_progress: bool = True,
+    concurrency: int = 4,
+    cache_dir: Optional[Union[str, Path]] = None,
+    output_compression: Optional[Literal["gzip"]] = None,
+    skip_unchanged: bool = False,
 ) -> tuple[List[Dict], Union[str, Dict[str, str]]]:
     """
     Extract reservation data and save it to file(s) in one operation.
@@ -258,6 +312,16 @@ def extract_and_save_reservations(
         add_timestamp: Whether to add timestamp to filename(s) (default: True)
         divide_by_type: Whether to divide by type into separate files (default: False)
         show_progress: Whether to show progress in console (default: True)
+        concurrency: Maximum number of pages fetched at the same time (default: 4)
+        cache_dir: Directory where fetched pages are cached and revalidated with
+                   conditional requests on the next run (default: None, no cache).
+                   The cache holds raw API responses, personal data included
+        output_compression: Compression of the output file: None (default) or 'gzip'.
+                            Generated filenames get a '.gz' extension
+        skip_unchanged: Whether to leave an existing file untouched when it already
+                        holds exactly this content, keeping its modification time
+                        (default: False). The comparison serializes the whole
+                        document in memory
 
     Returns:
         Tuple of (reservations list, filepath(s))
@@ -292,6 +356,8 @@ def extract_and_save_reservations(
         per_page=per_page,
         max_pages=max_pages,
         show_progress=show_progress,
+        concurrency=concurrency,
+        cache_dir=cache_dir,
     )
 
     # Save reservations
@@ -306,6 +372,8 @@ def extract_and_save_reservations(
         output_path=output_path,
         add_timestamp=add_timestamp,
         divide_by_type=divide_by_type,
+        output_compression=output_compression,
+        skip_unchanged=skip_unchanged,
     )
 
     if show_progress:
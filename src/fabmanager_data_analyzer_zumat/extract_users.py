@@ -5,17 +5,19 @@ This module provides functions to extract user data from the FabManager Open API
 and save it to JSON files with timestamped filenames.
 """
 
-import json
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Literal, Optional, Tuple, Union
 
-from .api_client import FabManagerAPIClient
-from .utils import clean_data_for_json, sanitize_filename
+from .utils import COMPRESSION_EXTENSIONS, sanitize_filename, write_json_file
 
 
 def extract_users(
-    base_url: str, api_token: str, show_progress: bool = True
+    base_url: str,
+    api_token: str,
+    show_progress: bool = True,
+    concurrency: int = 4,
+    cache_dir: Optional[Union[str, Path]] = None,
 ) -> List[Dict]:
     """
     Extract all users from the FabManager API.
@@ -28,6 +30,10 @@ def extract_users(
         base_url: The base URL of the FabManager instance (e.g., 'https://example-fabmanager.com')
         api_token: Your FabManager API authentication token
         show_progress: Whether to display progress information during extraction (default: True)
+        concurrency: Maximum number of pages fetched at the same time (default: 4)
+        cache_dir: Directory where fetched pages are cached and revalidated with
+                   conditional requests on the next run (default: None, no cache).
+                   The cache holds raw API responses, personal data included
 
     Returns:
         A list of dictionaries, where each dictionary contains user data
@@ -39,20 +45,28 @@ def extract_users(
         ... )
         >>> print(f"Extracted {len(users)} users")
     """
-    client = FabManagerAPIClient(base_url=base_url, api_token=api_token)
+    # Imported here so that importing the package does not load requests
+    from .api_client import _get_client
+
+    client = _get_client(base_url, api_token, cache_dir)
 
     users = client.fetch_all_as_list(
         endpoint="/open_api/v1/users",
         data_key="users",
         per_page=100,
         show_progress=show_progress,
+        concurrency=concurrency,
     )
 
     return users
 
 
 def save_users(
-    users: List[Dict], output_path: str = ".", custom_filename: Optional[str] = None
+    users: List[Dict],
+    output_path: str = ".",
+    custom_filename: Optional[str] = None,
+    output_compression: Optional[Literal["gzip"]] = None,
+    skip_unchanged: bool = False,
 ) -> str:
     """
     Save user data to a JSON file.
@@ -65,6 +79,12 @@ def save_users(
         output_path: Directory where the file should be saved (default: current directory)
         custom_filename: Optional custom filename (without extension). If not provided,
                         uses format 'FabManager_ExportedData_Users_DD_MM_YYYY_HH-MM.json'
+        output_compression: Compression of the output file: None (default) or 'gzip'.
+                            Filenames get a '.gz' extension
+        skip_unchanged: Whether to leave an existing file untouched when it already
+                        holds exactly this content, keeping its modification time
+                        (default: False). The comparison serializes the whole
+                        document in memory
 
     Returns:
         The full path to the saved file as a string
@@ -79,23 +99,26 @@ def save_users(
     output_dir.mkdir(parents=True, exist_ok=True)
 
     # Generate filename
+    extension = COMPRESSION_EXTENSIONS.get(output_compression or "", "")
     if custom_filename:
-        filename = f"{sanitize_filename(custom_filename)}.json"
+        filename = f"{sanitize_filename(custom_filename)}.json{extension}"
     else:
         timestamp = datetime.now().strftime("%d_%m_%Y_%H-%M")
-        filename = f"FabManager_ExportedData_Users_{timestamp}.json"
+        filename = f"FabManager_ExportedData_Users_{timestamp}.json{extension}"
 
     filepath = output_dir / filename
 
-    # Clean data to remove unusual line terminators
-    cleaned_users = clean_data_for_json(users)
-
     # Prepare output data
-    output_data = {"users": cleaned_users}
-
-    # Save to file
-    with open(filepath, "w", encoding="utf-8", newline="\n") as f:
-        json.dump(output_data, f, indent=2, ensure_ascii=False)
+    output_data = {"users": users}
+
+    # Save to file, removing unusual line terminators while serializing
+    write_json_file(
+        output_data,
+        filepath,
+        output_compression,
+        clean_line_terminators=True,
+        skip_unchanged=skip_unchanged,
+    )
 
     return str(filepath)
 
@@ -106,6 +129,10 @@ def extract_and_save_users(
     output_path: str = ".",
     custom_filename: Optional[str] = None,
     show_progress: bool = True,
+    concurrency: int = 4,
+    cache_dir: Optional[Union[str, Path]] = None,
+    output_compression: Optional[Literal["gzip"]] = None,
+    skip_unchanged: bool = False,
 ) -> Tuple[List[Dict], str]:
     """
     Extract users from FabManager API and save to a JSON file.
@@ -120,6 +147,16 @@ def extract_and_save_users(
         output_path: Directory where the file should be saved (default: current directory)
         custom_filename: Optional custom filename (without extension)
         show_progress: Whether to display progress information during extraction (default: True)
+        concurrency: Maximum number of pages fetched at the same time (default: 4)
+        cache_dir: Directory where fetched pages are cached and revalidated with
+                   conditional requests on the next run (default: None, no cache).
+                   The cache holds raw API responses, personal data included
+        output_compression: Compression of the output file: None (default) or 'gzip'.
+                            Generated filenames get a '.gz' extension
+        skip_unchanged: Whether to leave an existing file untouched when it already
+                        holds exactly this content, keeping its modification time
+                        (default: False). The comparison serializes the whole
+                        document in memory
 
     Returns:
         A tuple containing:
@@ -141,12 +178,20 @@ def extract_and_save_users(
     """
     # Extract users
     users = extract_users(
-        base_url=base_url, api_token=api_token, show_progress=show_progress
+        base_url=base_url,
+        api_token=api_token,
+        show_progress=show_progress,
+        concurrency=concurrency,
+        cache_dir=cache_dir,
     )
 
     # Save to file
     filepath = save_users(
-        users=users, output_path=output_path, custom_filename=custom_filename
+        users=users,
+        output_path=output_path,
+        custom_filename=custom_filename,
+        output_compression=output_compression,
+        skip_unchanged=skip_unchanged,
     )
 
     return users, filepath
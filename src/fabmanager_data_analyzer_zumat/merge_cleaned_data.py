@@ -5,10 +5,62 @@ This module provides functions to merge cleaned machine, training, and reservati
 into a single comprehensive dataset with unified metadata.
 """
 
-import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Optional, Tuple, Union
+from typing import Any, Dict, Iterator, List, Literal, Optional, Tuple, Union
+
+from .utils import (
+    COMPRESSION_EXTENSIONS,
+    load_json_file,
+    write_json_file,
+    write_json_lines_file,
+)
+
+# Metadata shared by all files. Taken from the first file unless given by the user
+_SHARED_METADATA_KEYS = (
+    "data_owner",
+    "data_steward",
+    "data_curator",
+    "data_exported_from",
+    "license",
+    "timezone",
+)
+
+
+def _load_data_file(file_path: str, data_key: str) -> Tuple[List, Dict]:
+    """
+    Load a cleaned data file.
+
+    Args:
+        file_path: Path to the cleaned JSON file
+        data_key: Key of the data array in the file
+
+    Returns:
+        Tuple of (data array, file metadata)
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+    """
+    path = Path(file_path)
+    if not path.exists():
+        raise FileNotFoundError(f"File not found: {file_path}")
+
+    data = load_json_file(path)
+    return data.get(data_key, []), data.get("metadata", {})
+
+
+def _iter_json_lines(output_data: Dict) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the lines of the JSON Lines representation of merged data.
+
+    The first line holds the metadata, each following line one record tagged
+    with the data section it belongs to.
+    """
+    yield {"metadata": output_data["metadata"]}
+    for section, records in output_data["data"].items():
+        for record in records:
+            yield {"type": section, "record": record}
 
 
 def merge_cleaned_data(
@@ -23,6 +75,9 @@ def merge_cleaned_data(
     data_exported_from: Optional[str] = None,
     license: Optional[str] = None,
     timezone: Optional[str] = None,
+    output_format: Literal["json", "jsonl"] = "json",
+    output_compression: Optional[Literal["gzip"]] = None,
+    compact: bool = False,
 ) -> Tuple[Dict, str]:
     """
     Merge cleaned FabManager data from multiple sources into a single dataset.
@@ -42,12 +97,21 @@ def merge_cleaned_data(
         data_exported_from: Source URL (optional, if not provided, taken from first file)
         license: License information (optional, if not provided, taken from first file)
         timezone: Timezone information (optional, if not provided, taken from first file)
+        output_format: Format of the output file:
+            - 'json': Single JSON document with 'metadata' and 'data' keys (default)
+            - 'jsonl': JSON Lines; a first line with the metadata, then one line per
+              record in the form {"type": <section>, "record": {...}}
+        output_compression: Compression of the output file: None (default) or 'gzip'.
+                            Generated output filenames get a '.gz' extension
+        compact: If True, write compact JSON without indentation (default: False).
+                 Smaller and faster to write and parse, but harder to read.
+                 JSON Lines output is always compact
 
     Returns:
         Tuple of (merged_data_dict, output_filepath)
 
     Raises:
-        ValueError: If fewer than 2 data paths are provided
+        ValueError: If fewer than 2 data paths are provided or output_format is invalid
         FileNotFoundError: If any provided file path doesn't exist
         json.JSONDecodeError: If any file is not valid JSON
 
@@ -71,6 +135,11 @@ def merge_cleaned_data(
         reservations_training_data_path,
     ]
 
+    if output_format not in ("json", "jsonl"):
+        raise ValueError(
+            f"Invalid output_format: {output_format!r}. Expected 'json' or 'jsonl'"
+        )
+
     if sum(path is not None for path in provided_paths) < 2:
         raise ValueError(
             "At least 2 data paths must be provided. "
@@ -78,133 +147,110 @@ def merge_cleaned_data(
             "reservations_machine_data_path, reservations_training_data_path"
         )
 
-    # Initialize merged data structure
-    merged_data = {}
-    merged_metadata = {"data_merged_at": datetime.now().strftime("%Y-%m-%dT%H:%M:%S")}
+    # Initialize merged data structure. Sections are added in the order of the
+    # sources below, which is the order they have in the output
+    merged_data: Dict[str, List] = {}
+    # Single timestamp for the metadata and the output filename
+    merged_at = datetime.now()
+    merged_metadata = {"data_merged_at": merged_at.strftime("%Y-%m-%dT%H:%M:%S")}
+
+    # Files to merge: (path, data key in file, metadata prefix, output section)
+    sources = [
+        (machines_data_path, "machines", "machine", "machines"),
+        (trainings_data_path, "trainings", "training", "trainings"),
+        (
+            reservations_machine_data_path,
+            "reservations",
+            "reservations_machine",
+            "reservations_machine",
+        ),
+        (
+            reservations_training_data_path,
+            "reservations",
+            "reservations_training",
+            "reservations_training",
+        ),
+    ]
+
+    # Shared metadata given by the user, in _SHARED_METADATA_KEYS order
+    user_metadata = dict(
+        zip(
+            _SHARED_METADATA_KEYS,
+            (
+                data_owner,
+                data_steward,
+                data_curator,
+                data_exported_from,
+                license,
+                timezone,
+            ),
+        )
+    )
 
     # Track if we've taken metadata from first file
     metadata_from_first_file = False
 
-    # Helper function to load and extract data
-    def load_data_file(file_path: Optional[str], data_key: str, metadata_prefix: str):
-        nonlocal metadata_from_first_file
-
-        if file_path is None:
-            return None
-
-        path = Path(file_path)
-        if not path.exists():
-            raise FileNotFoundError(f"File not found: {file_path}")
-
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        # Extract data array
-        data_array = data.get(data_key, [])
-
-        # Extract metadata
-        file_metadata = data.get("metadata", {})
-
-        # If this is the first file and user hasn't provided metadata, use file's metadata
-        if not metadata_from_first_file:
-            if data_owner is None and "data_owner" in file_metadata:
-                merged_metadata["data_owner"] = file_metadata["data_owner"]
-            if data_steward is None and "data_steward" in file_metadata:
-                merged_metadata["data_steward"] = file_metadata["data_steward"]
-            if data_curator is None and "data_curator" in file_metadata:
-                merged_metadata["data_curator"] = file_metadata["data_curator"]
-            if data_exported_from is None and "data_exported_from" in file_metadata:
-                merged_metadata["data_exported_from"] = file_metadata[
-                    "data_exported_from"
+    # Load the files in parallel, then merge them in the order above
+    with ThreadPoolExecutor(max_workers=len(sources)) as executor:
+        loading = [
+            (metadata_prefix, section, executor.submit(_load_data_file, path, data_key))
+            for path, data_key, metadata_prefix, section in sources
+            if path is not None
+        ]
+
+        for metadata_prefix, section, future in loading:
+            data_array, file_metadata = future.result()
+
+            # If this is the first file and user hasn't provided metadata, use file's metadata
+            if not metadata_from_first_file:
+                for key, value in user_metadata.items():
+                    if value is None and key in file_metadata:
+                        merged_metadata[key] = file_metadata[key]
+
+                metadata_from_first_file = True
+
+            # Add specific metadata for this data type
+            if "data_exported_at" in file_metadata:
+                merged_metadata[f"{metadata_prefix}_data_exported_at"] = file_metadata[
+                    "data_exported_at"
+                ]
+            if "data_cleaned_at" in file_metadata:
+                merged_metadata[f"{metadata_prefix}_data_cleaned_at"] = file_metadata[
+                    "data_cleaned_at"
                 ]
-            if license is None and "license" in file_metadata:
-                merged_metadata["license"] = file_metadata["license"]
-            if timezone is None and "timezone" in file_metadata:
-                merged_metadata["timezone"] = file_metadata["timezone"]
-
-            metadata_from_first_file = True
-
-        # Add specific metadata for this data type
-        if "data_exported_at" in file_metadata:
-            merged_metadata[f"{metadata_prefix}_data_exported_at"] = file_metadata[
-                "data_exported_at"
-            ]
-        if "data_cleaned_at" in file_metadata:
-            merged_metadata[f"{metadata_prefix}_data_cleaned_at"] = file_metadata[
-                "data_cleaned_at"
-            ]
-
-        return data_array
-
-    # Load machines data
-    machines_data = load_data_file(machines_data_path, "machines", "machine")
-    if machines_data is not None:
-        merged_data["machines"] = machines_data
-
-    # Load trainings data
-    trainings_data = load_data_file(trainings_data_path, "trainings", "training")
-    if trainings_data is not None:
-        merged_data["trainings"] = trainings_data
-
-    # Load machine reservations data
-    reservations_machine_data = load_data_file(
-        reservations_machine_data_path, "reservations", "reservations_machine"
-    )
-    if reservations_machine_data is not None:
-        merged_data["reservations_machine"] = reservations_machine_data
 
-    # Load training reservations data
-    reservations_training_data = load_data_file(
-        reservations_training_data_path, "reservations", "reservations_training"
-    )
-    if reservations_training_data is not None:
-        merged_data["reservations_training"] = reservations_training_data
+            merged_data[section] = data_array
 
     # Override with user-provided metadata if given
-    if data_owner is not None:
-        merged_metadata["data_owner"] = data_owner
-    if data_steward is not None:
-        merged_metadata["data_steward"] = data_steward
-    if data_curator is not None:
-        merged_metadata["data_curator"] = data_curator
-    if data_exported_from is not None:
-        merged_metadata["data_exported_from"] = data_exported_from
-    if license is not None:
-        merged_metadata["license"] = license
-    if timezone is not None:
-        merged_metadata["timezone"] = timezone
+    for key, value in user_metadata.items():
+        if value is not None:
+            merged_metadata[key] = value
 
     # Generate output filename if not provided
     output_path: Union[str, Path]
     if output_file is None:
-        timestamp = datetime.now().strftime("%d_%m_%Y_%H-%M")
-        output_path = Path.cwd() / f"FabManager_Merged_Data_{timestamp}.json"
+        extension = COMPRESSION_EXTENSIONS.get(output_compression or "", "")
+        timestamp = merged_at.strftime("%d_%m_%Y_%H-%M")
+        output_path = (
+            Path.cwd()
+            / f"FabManager_Merged_Data_{timestamp}.{output_format}{extension}"
+        )
     else:
         output_path = Path(output_file)
 
     # Ensure output directory exists
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
 
-    # Build final output structure with nested data
-    output_data = {"metadata": merged_metadata, "data": {}}
-
-    # Add data sections in the correct order under 'data' key
-    if "machines" in merged_data:
-        output_data["data"]["machines"] = merged_data["machines"]
-    if "trainings" in merged_data:
-        output_data["data"]["trainings"] = merged_data["trainings"]
-    if "reservations_machine" in merged_data:
-        output_data["data"]["reservations_machine"] = merged_data[
-            "reservations_machine"
-        ]
-    if "reservations_training" in merged_data:
-        output_data["data"]["reservations_training"] = merged_data[
-            "reservations_training"
-        ]
+    # Build final output structure with the data sections under 'data'
+    output_data: Dict[str, Dict] = {"metadata": merged_metadata, "data": merged_data}
 
     # Write output file
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(output_data, f, indent=2, ensure_ascii=False)
+    if output_format == "jsonl":
+        write_json_lines_file(
+            _iter_json_lines(output_data), output_path, output_compression
+        )
+    else:
+        write_json_file(output_data, output_path, output_compression, compact)
 
     return output_data, str(output_path)
 
@@ -5,8 +5,80 @@ This module provides helper functions for data cleaning, sanitization,
 and formatting.
 """
 
+import gzip
+import html
+import io
+import json
+import math
+import mmap
+import os
 import re
-from typing import Any
+import secrets
+import stat
+from contextlib import contextmanager
+from pathlib import Path
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore[assignment]
+
+# Buffer size for JSON output files. json.dump issues one write() per token,
+# so a large buffer keeps the number of system calls low.
+FILE_BUFFER_SIZE = 1024 * 1024
+
+# Supported output compressions and the extension appended to generated filenames
+COMPRESSION_EXTENSIONS = {"gzip": ".gz"}
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+# Files at least this large are memory-mapped instead of read into memory when
+# orjson is available, which parses straight from the mapped pages
+MMAP_THRESHOLD = 10 * 1024 * 1024
+
+# Number of batches handed to each worker process by map_records. A few batches
+# per worker balance the load while keeping the pickling overhead per record low.
+CHUNKS_PER_WORKER = 4
+
+# Minimum number of records for map_records to use worker processes
+PARALLEL_MIN_RECORDS = 1000
+
+# orjson parses integers wider than 64 bits as floats. Such literals have at least
+# 19 digits: documents are scanned for digit runs that long, chunk by chunk, after
+# mapping every digit to b"0" and every other byte to b" "
+_WIDE_INTEGER_DIGITS = 19
+_DIGIT_RUN_TABLE = bytes(0x30 if 0x30 <= byte <= 0x39 else 0x20 for byte in range(256))
+_DIGIT_RUN_SCAN_SIZE = 1024 * 1024
+
+# Characters replaced by sanitize_filename
+_UNSAFE_FILENAME_RE = re.compile(r"[^A-Za-z0-9_.-]")
+
+# Markup matched by clean_html_keep_links: comments, link start tags (group 1 holds
+# their attributes), link end tags (group 2) and any other tag. Quoted attribute
+# values are skipped as a whole, so a '>' inside them does not end the tag; the
+# last alternative strips tags with unbalanced quotes up to the next '>'.
+_ATTRIBUTES = r"""(?:"[^"]*"|'[^']*'|[^'">])*"""
+_MARKUP_RE = re.compile(
+    r"<!--.*?(?:-->|\Z)"
+    rf"|<a(?=[\s/>])({_ATTRIBUTES})(?:>|\Z)"
+    r"|(</a\s*>)"
+    rf"|<[A-Za-z/!?]{_ATTRIBUTES}(?:>|\Z)"
+    r"|<[A-Za-z/!?][^>]*(?:>|\Z)",
+    re.IGNORECASE | re.DOTALL,
+)
+_ATTRIBUTE_RE = re.compile(r"""([^\s/>=]+)(?:\s*=\s*("[^"]*"|'[^']*'|[^\s>]*))?""")
 
 
 def sanitize_filename(name: str) -> str:
@@ -25,10 +97,30 @@ def sanitize_filename(name: str) -> str:
         >>> sanitize_filename("My File: Name/With*Bad?Chars")
         'My_File__Name_With_Bad_Chars'
     """
-    sanitized = re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+    sanitized = _UNSAFE_FILENAME_RE.sub("_", name)
     return sanitized or "unknown"
 
 
+def _has_line_terminators(data: Any) -> bool:
+    """
+    Return True if any string in a dict/list structure contains LS or PS.
+
+    A membership test is a single C-level scan per string, much cheaper than
+    rebuilding the structure.
+    """
+    stack = [data]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            if "\u2028" in item or "\u2029" in item:
+                return True
+        elif isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, list):
+            stack.extend(item)
+    return False
+
+
 def clean_data_for_json(data: Any) -> Any:
     """
     Recursively clean data to remove unusual line terminators.
@@ -40,7 +132,8 @@ def clean_data_for_json(data: Any) -> Any:
         data: Data structure to clean (dict, list, str, or other)
 
     Returns:
-        Cleaned data structure
+        Cleaned data structure. Dicts and lists are copied only if they contain
+        such characters; otherwise the input itself is returned.
 
     Example:
         >>> data = {"text": "Line 1\u2028Line 2"}
@@ -51,9 +144,509 @@ def clean_data_for_json(data: Any) -> Any:
     if isinstance(data, str):
         # Replace unusual line terminators with standard newline
         return data.replace("\u2028", "\n").replace("\u2029", "\n")
-    elif isinstance(data, dict):
-        return {key: clean_data_for_json(value) for key, value in data.items()}
-    elif isinstance(data, list):
-        return [clean_data_for_json(item) for item in data]
-    else:
+    if not isinstance(data, (dict, list)) or not _has_line_terminators(data):
         return data
+
+    # Walk the structure with an explicit stack instead of recursion, so deeply
+    # nested data cannot exceed the recursion limit. Each entry pairs a source
+    # container with the new container its cleaned values are added to.
+    root: Any = {} if isinstance(data, dict) else []
+    stack: List[Tuple[Any, Any]] = [(data, root)]
+    while stack:
+        source, target = stack.pop()
+        is_dict = isinstance(source, dict)
+        for key, value in source.items() if is_dict else enumerate(source):
+            if isinstance(value, str):
+                value = value.replace("\u2028", "\n").replace("\u2029", "\n")
+            elif isinstance(value, (dict, list)):
+                container: Any = {} if isinstance(value, dict) else []
+                stack.append((value, container))
+                value = container
+
+            if is_dict:
+                target[key] = value
+            else:
+                target.append(value)
+
+    return root
+
+
+def _link_href(attributes: str) -> Optional[str]:
+    """Return the decoded value of the first href attribute of a link start tag."""
+    for match in _ATTRIBUTE_RE.finditer(attributes):
+        if match.group(1).lower() == "href":
+            value = match.group(2)
+            if value is None:
+                return None
+            if len(value) >= 2 and value[0] in "\"'" and value[-1] == value[0]:
+                value = value[1:-1]
+            return html.unescape(value)
+    return None
+
+
+def _html_to_text(html_content: str) -> str:
+    """Convert HTML to text for clean_html_keep_links, before whitespace handling."""
+    parts: List[str] = []
+    # URL and text of the link being read, if any. A link starts at an <a> tag
+    # with an href and ends at the next </a>; an <a href> nested inside it
+    # replaces its URL.
+    link_href: Optional[str] = None
+    link_parts: List[str] = []
+    position = 0
+    for match in _MARKUP_RE.finditer(html_content):
+        start, end = match.span()
+        text = html_content[position:start]
+        position = end
+        if text:
+            (parts if link_href is None else link_parts).append(html.unescape(text))
+
+        attributes, end_tag = match.groups()
+        if attributes is not None:
+            href = _link_href(attributes)
+            if href:
+                link_href = href
+            if not match.group().endswith("/>"):
+                continue
+        elif end_tag is None:
+            continue
+
+        # Links become "text (url)"; links without text are dropped
+        if link_href is not None:
+            link_text = "".join(link_parts).strip()
+            if link_text:
+                parts.append(f"{link_text} ({link_href})")
+            link_href = None
+            link_parts = []
+
+    text = html_content[position:]
+    if text:
+        (parts if link_href is None else link_parts).append(html.unescape(text))
+    # The text of a link that is never closed is kept as plain text
+    parts.extend(link_parts)
+    return "".join(parts)
+
+
+def clean_html_keep_links(
+    html_content: Optional[str], collapse_whitespace: bool = True
+) -> str:
+    """
+    Clean HTML content while preserving external links.
+
+    Removes all HTML tags but converts links to a readable format:
+    <a href="https://example.com">Click here</a> becomes "Click here (https://example.com)".
+    Gives the same result as the HTMLParser based cleaner used up to 0.2.1 on
+    valid HTML. The text of an unclosed link is kept rather than dropped.
+
+    Args:
+        html_content: HTML string to clean, or None
+        collapse_whitespace: If True (default), replace every run of whitespace
+                             with a single space. Otherwise whitespace is only
+                             stripped at both ends
+
+    Returns:
+        Cleaned text with links preserved in readable format
+
+    Example:
+        >>> html = '<p>Visit <a href="https://example.com">our site</a> for more.</p>'
+        >>> clean_html_keep_links(html)
+        'Visit our site (https://example.com) for more.'
+    """
+    if not html_content:
+        return ""
+
+    # Plain text without markup or character references needs no parsing
+    if "<" not in html_content and "&" not in html_content:
+        text = html_content
+    else:
+        text = _html_to_text(html_content)
+
+    if collapse_whitespace:
+        # str.split() uses the same whitespace definition as the regex \s
+        return " ".join(text.split())
+    return text.strip()
+
+
+def _may_contain_wide_integers(content: Union[bytes, memoryview]) -> bool:
+    """
+    Return True if a JSON document may hold an integer that does not fit in 64 bits.
+
+    Any run of _WIDE_INTEGER_DIGITS digits counts, including digits in strings or
+    floats, so the check can only report false positives.
+    """
+    wide_run = b"0" * _WIDE_INTEGER_DIGITS
+    with memoryview(content) as view:
+        for start in range(0, len(view), _DIGIT_RUN_SCAN_SIZE):
+            # Overlap the chunks so runs crossing a chunk boundary are found
+            end = start + _DIGIT_RUN_SCAN_SIZE + _WIDE_INTEGER_DIGITS - 1
+            if wide_run in view[start:end].tobytes().translate(_DIGIT_RUN_TABLE):
+                return True
+    return False
+
+
+def parse_json(content: Union[bytes, memoryview]) -> Any:
+    """
+    Parse a UTF-8 encoded JSON document.
+
+    Uses orjson when it is installed and falls back to the standard library
+    otherwise, or when the document may contain integers wider than 64 bits
+    (which orjson would silently turn into floats).
+
+    Args:
+        content: Raw JSON document (bytes or a buffer such as a memoryview)
+
+    Returns:
+        Parsed JSON content
+
+    Raises:
+        json.JSONDecodeError: If the content is not valid JSON
+    """
+    if orjson is not None and not _may_contain_wide_integers(content):
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            # The stdlib parser is more lenient (e.g. NaN/Infinity literals)
+            pass
+    return json.loads(str(content, "utf-8"))
+
+
+def load_json_file(path: Union[str, Path]) -> Any:
+    """
+    Load a JSON file, transparently decompressing gzip files.
+
+    Uses orjson when it is installed (``pip install fabmanager-data-analyzer-zumat[fast]``)
+    and falls back to the standard library otherwise. With orjson, files of at
+    least MMAP_THRESHOLD bytes are memory-mapped rather than copied into memory.
+
+    Args:
+        path: Path to the JSON file (plain or gzip-compressed)
+
+    Returns:
+        Parsed JSON content
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        json.JSONDecodeError: If the file is not valid JSON
+    """
+    path = Path(path)
+    if orjson is not None and path.stat().st_size >= MMAP_THRESHOLD:
+        with open(path, "rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mapped:
+            if mapped[:2] == _GZIP_MAGIC:
+                return parse_json(gzip.decompress(mapped))
+            with memoryview(mapped) as view:
+                return parse_json(view)
+
+    content = path.read_bytes()
+    if content[:2] == _GZIP_MAGIC:
+        content = gzip.decompress(content)
+    return parse_json(content)
+
+
+def _create_temporary_file(path: Path) -> Tuple[int, Path]:
+    """
+    Create a new, uniquely named hidden file next to `path` and open it for writing.
+
+    The file gets the permissions of `path` if it exists, and the default
+    permissions of new files (0666 minus the umask) otherwise.
+
+    Returns:
+        Tuple of (file descriptor, temporary file path)
+    """
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+    while True:
+        # Hidden name, so it is not picked up by patterns like '*.json'
+        tmp_path = path.with_name(f".{path.name}.{secrets.token_hex(8)}.tmp")
+        try:
+            fd = os.open(tmp_path, flags, 0o666)
+            break
+        except FileExistsError:
+            continue
+
+    try:
+        mode = stat.S_IMODE(path.stat().st_mode)
+    except FileNotFoundError:
+        pass
+    else:
+        os.chmod(tmp_path, mode)
+    return fd, tmp_path
+
+
+@contextmanager
+def _atomic_output(
+    path: Union[str, Path], compression: Optional[str]
+) -> Iterator[IO[bytes]]:
+    """
+    Open a buffered binary output file that atomically replaces `path` once written.
+
+    The data goes to a uniquely named temporary file next to `path`, so concurrent
+    writers never share it. When the block exits normally, the temporary file
+    replaces `path` (os.replace), so readers only ever see the previous or the
+    complete new file. On error it is removed and `path` is left untouched.
+    A symlinked `path` is written through: the link is kept and its target
+    replaced.
+
+    Args:
+        path: Destination file path
+        compression: None for a plain file, or 'gzip'
+
+    Yields:
+        Writable binary file object
+
+    Raises:
+        ValueError: If the compression is not supported
+    """
+    if compression is not None and compression not in COMPRESSION_EXTENSIONS:
+        raise ValueError(
+            f"Unsupported compression: {compression!r}. "
+            f"Expected one of: {', '.join(COMPRESSION_EXTENSIONS)} or None"
+        )
+
+    path = Path(os.path.realpath(path))
+    fd, tmp_path = _create_temporary_file(path)
+    try:
+        with open(fd, "wb", buffering=FILE_BUFFER_SIZE) as f:
+            if compression is None:
+                yield f
+            else:
+                # The gzip header names the final file, not the temporary one
+                with gzip.GzipFile(
+                    filename=path.name, mode="wb", fileobj=f, compresslevel=6
+                ) as compressed, io.BufferedWriter(
+                    compressed, buffer_size=FILE_BUFFER_SIZE
+                ) as buffered:
+                    yield buffered
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _replace_line_terminators(content: bytes) -> bytes:
+    """
+    Replace raw LS/PS characters in UTF-8 encoded JSON with an escaped newline.
+
+    In serialized JSON these characters can only occur inside string literals, so
+    this gives the same result as serializing clean_data_for_json(data).
+    """
+    return content.replace(b"\xe2\x80\xa8", b"\\n").replace(b"\xe2\x80\xa9", b"\\n")
+
+
+def _encode_json_chunks(
+    data: Any, compact: bool, clean_line_terminators: bool
+) -> Iterator[bytes]:
+    """
+    Serialize data with the standard library, yielding UTF-8 encoded chunks.
+
+    Gives the same output as json.dump(ensure_ascii=False) with the layout used
+    by write_json_file.
+    """
+    if compact:
+        encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    else:
+        encoder = json.JSONEncoder(ensure_ascii=False, indent=2)
+    for chunk in encoder.iterencode(data):
+        encoded = chunk.encode("utf-8")
+        if clean_line_terminators:
+            encoded = _replace_line_terminators(encoded)
+        yield encoded
+
+
+def _file_has_content(
+    path: Union[str, Path], content: bytes, compression: Optional[str]
+) -> bool:
+    """
+    Return True if the file at `path` already holds `content`.
+
+    Compressed files are compared on their decompressed content, since the gzip
+    header changes with every write.
+    """
+    path = Path(path)
+    try:
+        if compression is None:
+            # Different sizes can be detected without reading the file
+            if path.stat().st_size != len(content):
+                return False
+            return path.read_bytes() == content
+        with gzip.open(path, "rb") as f:
+            return f.read() == content
+    except (OSError, EOFError):
+        return False
+
+
+def write_json_file(
+    data: Any,
+    path: Union[str, Path],
+    compression: Optional[str] = None,
+    compact: bool = False,
+    clean_line_terminators: bool = False,
+    skip_unchanged: bool = False,
+) -> bool:
+    """
+    Write data to a UTF-8 JSON file indented with 2 spaces.
+
+    The file is written under a temporary name and then atomically moved into
+    place, so an interrupted write never leaves a truncated file behind.
+
+    Uses orjson when it is installed and falls back to the standard library
+    otherwise, or when orjson cannot serialize the data (e.g. integers larger
+    than 64 bits). Both produce the same layout.
+
+    Args:
+        data: JSON-serializable data
+        path: Destination file path
+        compression: Output compression: None (default) or 'gzip'
+        compact: If True, write the JSON without indentation or spaces, which is
+                 smaller and faster to write and parse (default: False)
+        clean_line_terminators: If True, write Unicode line and paragraph
+                 separators (U+2028, U+2029) in strings as newlines, like
+                 clean_data_for_json, without building a cleaned copy of the data
+        skip_unchanged: If True, leave the file untouched when it already holds
+                 exactly this content, so its modification time is kept and
+                 nothing is written (default: False)
+
+    Returns:
+        True if the file was written, False if it was skipped as unchanged
+
+    Raises:
+        ValueError: If the compression is not supported
+    """
+    content = None
+    if orjson is not None:
+        try:
+            option = orjson.OPT_NON_STR_KEYS
+            if not compact:
+                option |= orjson.OPT_INDENT_2
+            content = orjson.dumps(data, option=option)
+        except orjson.JSONEncodeError:
+            pass
+        else:
+            if clean_line_terminators:
+                content = _replace_line_terminators(content)
+
+    if skip_unchanged:
+        if content is None:
+            content = b"".join(
+                _encode_json_chunks(data, compact, clean_line_terminators)
+            )
+        if _file_has_content(path, content, compression):
+            return False
+
+    with _atomic_output(path, compression) as f:
+        if content is not None:
+            f.write(content)
+        else:
+            # Encode chunk by chunk straight into the binary buffer
+            for chunk in _encode_json_chunks(data, compact, clean_line_terminators):
+                f.write(chunk)
+
+    return True
+
+
+def _dump_json_line(item: Any) -> bytes:
+    """Serialize a single item to one line of compact UTF-8 JSON (without newline)."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(item, option=orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(item, ensure_ascii=False).encode("utf-8")
+
+
+def write_json_lines_file(
+    items: Iterable[Any], path: Union[str, Path], compression: Optional[str] = None
+) -> None:
+    """
+    Write items to a UTF-8 JSON Lines file, one compact JSON document per line.
+
+    Items are serialized and written one at a time, so `items` can be a generator.
+    Like write_json_file, the file is replaced atomically once complete.
+
+    Args:
+        items: JSON-serializable items
+        path: Destination file path
+        compression: Output compression: None (default) or 'gzip'
+
+    Raises:
+        ValueError: If the compression is not supported
+    """
+    with _atomic_output(path, compression) as f:
+        for item in items:
+            f.write(_dump_json_line(item))
+            f.write(b"\n")
+
+
+def write_csv_file(
+    records: List[Dict], path: Union[str, Path], compression: Optional[str] = None
+) -> None:
+    """
+    Write records to a UTF-8 CSV file with a header row.
+
+    The columns are the keys of all records, in the order they first appear.
+    Keys missing from a record are written as empty cells.
+    Like write_json_file, the file is replaced atomically once complete.
+
+    Args:
+        records: Flat records (values are written with str())
+        path: Destination file path
+        compression: Output compression: None (default) or 'gzip'
+
+    Raises:
+        ValueError: If the compression is not supported
+    """
+    import csv
+
+    fieldnames = list(dict.fromkeys(key for record in records for key in record))
+
+    with _atomic_output(path, compression) as output, io.TextIOWrapper(
+        output, encoding="utf-8", newline=""
+    ) as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(records)
+
+
+def map_records(
+    func: Callable[[Dict], Optional[Dict]],
+    records: Iterable[Dict],
+    workers: Optional[int] = None,
+) -> List[Dict]:
+    """
+    Apply a cleaning function to each record, dropping records mapped to None.
+
+    With more than one worker and at least PARALLEL_MIN_RECORDS records, records
+    are processed in a pool of worker processes, each receiving the records in a
+    few large batches. Smaller inputs are cleaned in the current process, where
+    starting the pool would cost more than it saves. The order of the returned
+    records always matches the input. `func` must be picklable, e.g. a
+    module-level function or a functools.partial of one.
+
+    Args:
+        func: Function cleaning a single record, returning None to filter it out
+        records: Records to clean
+        workers: Number of worker processes (optional). If None or 1, records are
+                 cleaned in the current process
+
+    Returns:
+        List of cleaned records
+
+    Example:
+        >>> map_records(lambda r: r if r["keep"] else None, [{"keep": True}, {"keep": False}])
+        [{'keep': True}]
+    """
+    if workers is not None and workers > 1:
+        records = list(records)
+        if len(records) >= PARALLEL_MIN_RECORDS:
+            # Imported here, as most runs never start a pool
+            from concurrent.futures import ProcessPoolExecutor
+
+            chunksize = max(1, math.ceil(len(records) / (workers * CHUNKS_PER_WORKER)))
+
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results: Iterable[Optional[Dict]] = executor.map(
+                    func, records, chunksize=chunksize
+                )
+                return [record for record in results if record is not None]
+
+    results = map(func, records)
+    return [record for record in results if record is not None]
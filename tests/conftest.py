@@ -0,0 +1,116 @@
+"""Shared fixtures for the test suite."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+
+class StubAPI:
+    """
+    Minimal FabManager Open API serving `items` from /open_api/v1/users.
+
+    Pages carry the Total / Per-Page / Link headers of the real API. Attributes
+    can be changed by tests to alter the responses, and every request is recorded.
+    """
+
+    def __init__(self, items: List[Dict]):
+        self.items = items
+        # Send the Total and Per-Page headers
+        self.send_total = True
+        # Send an ETag and answer matching If-None-Match headers with 304
+        self.send_etag = False
+        # Number of upcoming requests answered with 503
+        self.failures = 0
+        # Seconds each page takes to be served
+        self.delay = 0.0
+        self.requests: List[Dict] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self.base_url = ""
+
+    def pages_requested(self) -> List[int]:
+        return [request["page"] for request in self.requests]
+
+    def etag(self, page: int, per_page: int) -> str:
+        return f'W/"{page}-{per_page}"'
+
+    def handle(self, handler: BaseHTTPRequestHandler) -> None:
+        query = parse_qs(urlparse(handler.path).query)
+        page = int(query.get("page", ["1"])[0])
+        per_page = int(query.get("per_page", ["100"])[0])
+
+        with self._lock:
+            self.requests.append({"page": page, "headers": dict(handler.headers)})
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            failing = self.failures > 0
+            if failing:
+                self.failures -= 1
+        try:
+            time.sleep(self.delay)
+            if failing:
+                handler.send_response(503)
+                handler.send_header("Content-Length", "0")
+                handler.end_headers()
+                return
+
+            etag = self.etag(page, per_page)
+            if self.send_etag and handler.headers.get("If-None-Match") == etag:
+                handler.send_response(304)
+                handler.send_header("ETag", etag)
+                handler.end_headers()
+                return
+
+            first = (page - 1) * per_page
+            last = first + per_page
+            chunk = self.items[first:last]
+            body = json.dumps({"users": chunk}).encode("utf-8")
+            handler.send_response(200)
+            if self.send_etag:
+                handler.send_header("ETag", etag)
+            if self.send_total:
+                handler.send_header("Total", str(len(self.items)))
+                handler.send_header("Per-Page", str(per_page))
+            if page * per_page < len(self.items):
+                handler.send_header(
+                    "Link",
+                    f'<{self.base_url}/open_api/v1/users?page={page + 1}>; rel="next"',
+                )
+            handler.send_header("Content-Type", "application/json")
+            handler.send_header("Content-Length", str(len(body)))
+            handler.end_headers()
+            handler.wfile.write(body)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+@pytest.fixture
+def stub_api():
+    """Serve a StubAPI with 23 users on a local port for the duration of a test."""
+    api = StubAPI([{"id": i, "email": f"user{i}@example.com"} for i in range(1, 24)])
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            api.handle(self)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    api.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    )
+    thread.start()
+    try:
+        yield api
+    finally:
+        server.shutdown()
+        server.server_close()
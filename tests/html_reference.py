@@ -0,0 +1,122 @@
+"""Reference implementation and inputs for the HTML cleaner tests."""
+
+import random
+import re
+from html.parser import HTMLParser
+from typing import List, Optional
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class _ReferenceLinkExtractor(HTMLParser):
+    """The HTMLParser based link extractor the cleaners used up to 0.2.1."""
+
+    def __init__(self):
+        super().__init__()
+        self.result = []
+        self.current_link = None
+        self.current_text = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            for attr_name, attr_value in attrs:
+                if attr_name == "href":
+                    self.current_link = attr_value
+                    break
+
+    def handle_endtag(self, tag):
+        if tag == "a" and self.current_link:
+            link_text = "".join(self.current_text).strip()
+            if link_text:
+                self.result.append(f"{link_text} ({self.current_link})")
+            self.current_link = None
+            self.current_text = []
+
+    def handle_data(self, data):
+        if self.current_link is not None:
+            self.current_text.append(data)
+        else:
+            self.result.append(data)
+
+
+def reference_clean_html_keep_links(
+    html_content: Optional[str], collapse_whitespace: bool
+) -> str:
+    """Clean HTML the way the cleaners did with HTMLParser."""
+    if not html_content:
+        return ""
+    parser = _ReferenceLinkExtractor()
+    parser.feed(html_content)
+    text = "".join(parser.result).strip()
+    if collapse_whitespace:
+        text = _WHITESPACE_RE.sub(" ", text).strip()
+    return text
+
+
+# Valid HTML fragments seen in (or close to) FabManager descriptions
+HTML_PIECES = [
+    "<p>",
+    "</p>",
+    "<br/>",
+    "<br>",
+    "<b>",
+    "</b>",
+    "<ul>",
+    "<li>",
+    "</li>",
+    "text ",
+    " more",
+    "\n",
+    "  ",
+    "\t",
+    "&amp;",
+    "&lt;",
+    "&nbsp;",
+    "&eacute;",
+    "é",
+    "x < y",
+    '<a href="https://x.org/?a=1&amp;b=2">',
+    "<a href='http://y'>",
+    "<A HREF=http://z>",
+    '<a class="c" href="u" target="_blank">',
+    '<a data-href="no" href="yes">',
+    '<a title="href=bad" href="good">',
+    "<a href=\"u\" title='x>y'>",
+    '<a name="n">',
+    "</a>",
+    "<!-- c -->",
+    '<img src="i.png" alt="pic">',
+    '<img alt="a>b">',
+    '<div title="a > b">',
+    "</div>",
+    '<span style="color:red">',
+    "</span>",
+]
+
+
+# Valid HTML inputs, including the cases the first regex based cleaner got wrong
+VALID_HTML = [
+    "",
+    "plain  text\nwith   spaces",
+    '<p>Visit <a href="https://example.com">our site</a> for more.</p>',
+    '<a data-href="no" href="yes">t</a>',
+    '<a title="href=no" href="yes">t</a>',
+    '<A HREF = "https://example.com/?a=1&amp;b=2">docs</A>',
+    "<a href=https://example.com>unquoted</a>",
+    '<img alt="a>b"> text',
+    '<div title="a > b">t</div>',
+    "<p title='it > is'>quoted</p>",
+    '<a href="u">a <a name="n">b</a> c</a>',
+    '<a href="u">x <a href="v">y</a> z</a>',
+    '<a href="u"></a>empty link',
+    '<a href="u"/>self-closing',
+    "<!-- <a href='hidden'>comment</a> -->shown",
+    "<p>caf&eacute; &amp; bar&nbsp;</p><p>x &lt; y</p>",
+    "<ul>\n  <li>one</li>\n  <li>two</li>\n</ul>",
+]
+
+
+def random_html(rng: random.Random) -> str:
+    """Build a random fragment from HTML_PIECES with every link closed at the end."""
+    pieces: List[str] = rng.choices(HTML_PIECES, k=rng.randint(1, 12))
+    return "".join(pieces) + "</a>"
@@ -0,0 +1,178 @@
+"""Tests for fabmanager_data_analyzer_zumat.api_client against a local stub API."""
+
+import logging
+import os
+import stat
+
+import pytest
+import requests
+
+from fabmanager_data_analyzer_zumat.api_client import FabManagerAPIClient
+
+ENDPOINT = "/open_api/v1/users"
+
+
+def fetch(client, **kwargs):
+    kwargs.setdefault("per_page", 3)
+    kwargs.setdefault("show_progress", False)
+    return client.fetch_all_as_list(ENDPOINT, "users", **kwargs)
+
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+@pytest.mark.parametrize("send_total", [True, False])
+def test_fetch_all_pages_in_order(stub_api, concurrency, send_total):
+    stub_api.send_total = send_total
+    client = FabManagerAPIClient(stub_api.base_url, "token")
+
+    assert fetch(client, concurrency=concurrency) == stub_api.items
+    assert sorted(stub_api.pages_requested()) == list(range(1, 9))
+
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+def test_fetch_stops_at_max_pages(stub_api, concurrency):
+    client = FabManagerAPIClient(stub_api.base_url, "token")
+
+    assert fetch(client, max_pages=3, concurrency=concurrency) == stub_api.items[:9]
+    assert sorted(stub_api.pages_requested()) == [1, 2, 3]
+
+
+def test_pages_are_prefetched_concurrently(stub_api):
+    stub_api.delay = 0.05
+    client = FabManagerAPIClient(stub_api.base_url, "token")
+
+    assert fetch(client, concurrency=4) == stub_api.items
+    assert stub_api.max_in_flight == 4
+
+
+def test_pages_are_fetched_one_by_one_without_total(stub_api):
+    stub_api.delay = 0.01
+    stub_api.send_total = False
+    client = FabManagerAPIClient(stub_api.base_url, "token")
+
+    assert fetch(client, concurrency=4) == stub_api.items
+    assert stub_api.max_in_flight == 1
+    assert stub_api.pages_requested() == list(range(1, 9))
+
+
+def test_single_page(stub_api):
+    client = FabManagerAPIClient(stub_api.base_url, "token")
+
+    assert fetch(client, per_page=100, concurrency=4) == stub_api.items
+    assert stub_api.pages_requested() == [1]
+
+
+def test_requests_are_authenticated(stub_api):
+    client = FabManagerAPIClient(stub_api.base_url, "secret")
+
+    fetch(client, max_pages=1)
+
+    assert stub_api.requests[0]["headers"]["Authorization"] == "Token token=secret"
+
+
+def test_transient_failures_are_retried(stub_api):
+    stub_api.failures = 2
+    client = FabManagerAPIClient(stub_api.base_url, "token")
+
+    assert fetch(client, concurrency=1) == stub_api.items
+
+
+def test_connection_pool_grows_to_concurrency(stub_api, caplog):
+    stub_api.delay = 0.05
+    client = FabManagerAPIClient(stub_api.base_url, "token")
+
+    with caplog.at_level(logging.WARNING, logger="urllib3"):
+        assert fetch(client, per_page=1, concurrency=20) == stub_api.items
+
+    assert stub_api.max_in_flight == 20
+    assert client.session.get_adapter(stub_api.base_url)._pool_maxsize == 20
+    assert "Connection pool is full" not in caplog.text
+
+
+def test_replaced_adapter_is_closed_when_the_pool_grows(stub_api):
+    client = FabManagerAPIClient(stub_api.base_url, "token")
+    fetch(client, concurrency=1)
+    old_adapter = client.session.get_adapter(stub_api.base_url)
+    assert len(old_adapter.poolmanager.pools) == 1
+
+    assert fetch(client, per_page=1, concurrency=20) == stub_api.items
+
+    assert client.session.get_adapter(stub_api.base_url) is not old_adapter
+    assert len(old_adapter.poolmanager.pools) == 0
+
+
+def test_given_session_adapters_are_left_untouched(stub_api):
+    session = requests.Session()
+    adapter = session.get_adapter(stub_api.base_url)
+    client = FabManagerAPIClient(stub_api.base_url, "token", session=session)
+
+    assert fetch(client, per_page=1, concurrency=20) == stub_api.items
+    assert session.get_adapter(stub_api.base_url) is adapter
+
+
+def _cache_files(cache_dir):
+    return sorted(path.name for path in cache_dir.iterdir())
+
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+def test_cached_pages_are_revalidated(stub_api, tmp_path, concurrency):
+    stub_api.send_etag = True
+    client = FabManagerAPIClient(stub_api.base_url, "token", cache_dir=tmp_path)
+
+    assert fetch(client, concurrency=concurrency) == stub_api.items
+    assert len(_cache_files(tmp_path)) == 2 * 8
+    first_run = len(stub_api.requests)
+
+    assert fetch(client, concurrency=concurrency) == stub_api.items
+    revalidations = stub_api.requests[first_run:]
+    assert len(revalidations) == 8
+    assert all("If-None-Match" in request["headers"] for request in revalidations)
+
+
+def test_pages_without_validators_are_not_cached(stub_api, tmp_path):
+    client = FabManagerAPIClient(stub_api.base_url, "token", cache_dir=tmp_path)
+
+    assert fetch(client) == stub_api.items
+    assert not tmp_path.exists() or _cache_files(tmp_path) == []
+
+
+def test_cache_is_not_shared_between_tokens(stub_api, tmp_path):
+    stub_api.send_etag = True
+    fetch(FabManagerAPIClient(stub_api.base_url, "token-a", cache_dir=tmp_path))
+    first_run = len(stub_api.requests)
+
+    client = FabManagerAPIClient(stub_api.base_url, "token-b", cache_dir=tmp_path)
+
+    assert fetch(client) == stub_api.items
+    assert not any(
+        "If-None-Match" in request["headers"]
+        for request in stub_api.requests[first_run:]
+    )
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX file modes")
+def test_cache_files_are_private(stub_api, tmp_path):
+    stub_api.send_etag = True
+    cache_dir = tmp_path / "cache"
+    client = FabManagerAPIClient(stub_api.base_url, "token", cache_dir=cache_dir)
+
+    fetch(client)
+    fetch(client)
+
+    assert stat.S_IMODE(cache_dir.stat().st_mode) == 0o700
+    for path in cache_dir.iterdir():
+        assert stat.S_IMODE(path.stat().st_mode) == 0o600, path.name
+
+
+def test_broken_cache_entries_are_fetched_again(stub_api, tmp_path):
+    stub_api.send_etag = True
+    client = FabManagerAPIClient(stub_api.base_url, "token", cache_dir=tmp_path)
+    fetch(client)
+    for path in tmp_path.glob("*.meta.json"):
+        path.write_text("not json")
+    first_run = len(stub_api.requests)
+
+    assert fetch(client) == stub_api.items
+    assert not any(
+        "If-None-Match" in request["headers"]
+        for request in stub_api.requests[first_run:]
+    )
@@ -0,0 +1,43 @@
+"""Tests for fabmanager_data_analyzer_zumat.clean_machines_data."""
+
+import random
+
+import pytest
+from html_reference import VALID_HTML, random_html, reference_clean_html_keep_links
+
+from fabmanager_data_analyzer_zumat.clean_machines_data import clean_html_keep_links
+
+
+@pytest.mark.parametrize("html_content", VALID_HTML)
+def test_clean_html_keep_links_matches_html_parser(html_content):
+    expected = reference_clean_html_keep_links(html_content, collapse_whitespace=True)
+
+    assert clean_html_keep_links(html_content) == expected
+
+
+def test_clean_html_keep_links_matches_html_parser_on_random_html():
+    rng = random.Random(0)
+    for _ in range(2000):
+        html_content = random_html(rng)
+        expected = reference_clean_html_keep_links(
+            html_content, collapse_whitespace=True
+        )
+        assert clean_html_keep_links(html_content) == expected, html_content
+
+
+@pytest.mark.parametrize(
+    "html_content, expected",
+    [
+        ('<a data-href="no" href="yes">t</a>', "t (yes)"),
+        ('<img alt="a>b">', ""),
+        ('<div title="a > b">t</div>', "t"),
+        ('<a href="u">a <a name="n">b</a> c</a>', "a b (u) c"),
+        (None, ""),
+    ],
+)
+def test_clean_html_keep_links(html_content, expected):
+    assert clean_html_keep_links(html_content) == expected
+
+
+def test_clean_html_keep_links_keeps_text_of_unclosed_link():
+    assert clean_html_keep_links('before <a href="u">after') == "before after"
@@ -0,0 +1,209 @@
+"""Tests for the machine and training reservation cleaners."""
+
+import csv
+import gzip
+import io
+
+import pytest
+
+from fabmanager_data_analyzer_zumat import utils
+from fabmanager_data_analyzer_zumat.clean_reservations_common import metadata_file_path
+from fabmanager_data_analyzer_zumat.clean_reservations_machine import (
+    clean_reservations_machine_data,
+)
+from fabmanager_data_analyzer_zumat.clean_reservations_training import (
+    clean_reservations_training_data,
+)
+from fabmanager_data_analyzer_zumat.utils import load_json_file, write_json_file
+
+EXPORT_NAME = "FabManager_ExportedData_Reservations_02_03_2025_10-30.json"
+
+RESERVATIONS = [
+    {
+        "id": 1,
+        "reservable_id": 7,
+        "reservable_type": "Machine",
+        "updated_at": "2025-01-01T09:00:00.000+01:00",
+        "created_at": "2025-01-01T08:00:00.000+01:00",
+        "user": {"group": {"name": "Student"}},
+        "reservable": {"id": 7, "slug": "laser-cutter"},
+        "reserved_slots": [
+            {
+                "canceled_at": None,
+                "start_at": "2025-01-02T10:00:00.000+01:00",
+                "end_at": "2025-01-02T11:30:00.000+01:00",
+            }
+        ],
+    },
+    {
+        "id": 2,
+        "reservable_id": 3,
+        "reservable_type": "Training",
+        "updated_at": "2025-01-03T09:00:00.000+01:00",
+        "created_at": "2025-01-03T08:00:00.000+01:00",
+        "user": {"group": {"name": "Staff"}},
+        "reservable": {"id": 3, "slug": "laser-basics"},
+        "reserved_slots": [{"canceled_at": "2025-01-04T08:00:00.000+01:00"}],
+    },
+    # Invalid machine reservation, without reservable_id
+    {"id": 3, "reservable_type": "Machine"},
+]
+
+MACHINE_RESERVATION = {
+    "updated_at": "2025-01-01",
+    "created_at": "2025-01-01",
+    "user_group": "Student",
+    "machine_id": 7,
+    "machine_url": "https://fab.example/laser-cutter",
+    "booking_date": "2025-01-02",
+    "canceled": "False",
+    "time_spent_hours": "1.5",
+}
+
+TRAINING_RESERVATION = {
+    "updated_at": "2025-01-03",
+    "created_at": "2025-01-03",
+    "user_group": "Staff",
+    "training_id": 3,
+    "training_url": "https://fab.example/laser-basics",
+    "canceled": "True",
+}
+
+CLEANERS = [
+    (clean_reservations_machine_data, "Machine", MACHINE_RESERVATION),
+    (clean_reservations_training_data, "Training", TRAINING_RESERVATION),
+]
+
+
+@pytest.fixture
+def export_file(tmp_path):
+    path = tmp_path / EXPORT_NAME
+    write_json_file({"reservations": RESERVATIONS}, path)
+    return path
+
+
+def _clean(cleaner, export_file, **kwargs):
+    return cleaner(
+        str(export_file),
+        updated_at_mode="only_date",
+        created_at_mode="only_date",
+        create_linked_data=True,
+        base_domain="https://fab.example/",
+        license="CC0",
+        **kwargs,
+    )
+
+
+def _read_csv(path):
+    content = path.read_bytes()
+    if path.suffix == ".gz":
+        content = gzip.decompress(content)
+    return list(csv.DictReader(io.StringIO(content.decode("utf-8"), newline="")))
+
+
+@pytest.mark.parametrize("cleaner, reservable_type, expected", CLEANERS)
+def test_json_output(export_file, cleaner, reservable_type, expected):
+    output_file = export_file.parent / "out" / "cleaned.json"
+
+    records, path = _clean(cleaner, export_file, output_file=str(output_file))
+
+    assert records == [expected]
+    assert path == str(output_file)
+    output = load_json_file(output_file)
+    assert output["reservations"] == [expected]
+    assert output["metadata"]["license"] == "CC0"
+    assert output["metadata"]["data_exported_at"] == "2025-03-02T10:30"
+
+
+@pytest.mark.parametrize("cleaner, reservable_type, expected", CLEANERS)
+@pytest.mark.parametrize("compression", [None, "gzip"])
+def test_csv_output_with_metadata_file(
+    export_file, cleaner, reservable_type, expected, compression
+):
+    records, path = _clean(
+        cleaner, export_file, output_format="csv", output_compression=compression
+    )
+
+    assert records == [expected]
+    output_path = export_file.parent / path
+    assert output_path.name.startswith(
+        f"FabManager_Reservations_{reservable_type}_Cleaned_linked_"
+    )
+    assert output_path.name.endswith(".csv.gz" if compression else ".csv")
+    assert _read_csv(output_path) == [
+        {key: str(value) for key, value in expected.items()}
+    ]
+    metadata = load_json_file(metadata_file_path(output_path))
+    assert set(metadata) == {"metadata"}
+    assert metadata["metadata"]["license"] == "CC0"
+    assert metadata["metadata"]["data_exported_at"] == "2025-03-02T10:30"
+
+
+def test_csv_metadata_file_for_given_output_file(export_file):
+    output_file = export_file.parent / "reservations.csv.gz"
+
+    _clean(
+        clean_reservations_machine_data,
+        export_file,
+        output_file=str(output_file),
+        output_format="csv",
+        output_compression="gzip",
+    )
+
+    assert sorted(p.name for p in export_file.parent.iterdir()) == [
+        EXPORT_NAME,
+        "reservations.csv.gz",
+        "reservations.metadata.json",
+    ]
+    assert output_file.read_bytes()[:2] == b"\x1f\x8b"
+
+
+@pytest.mark.parametrize(
+    "output_path, expected",
+    [
+        ("reservations.csv", "reservations.metadata.json"),
+        ("reservations.csv.gz", "reservations.metadata.json"),
+        ("out/reservations.v2.csv", "out/reservations.v2.metadata.json"),
+    ],
+)
+def test_metadata_file_path(output_path, expected):
+    assert metadata_file_path(output_path).as_posix() == expected
+
+
+@pytest.mark.parametrize("cleaner, reservable_type, expected", CLEANERS)
+def test_parallel_cleaning_keeps_records_in_order(
+    export_file, monkeypatch, cleaner, reservable_type, expected
+):
+    monkeypatch.setattr(utils, "PARALLEL_MIN_RECORDS", 0)
+    # Interleaved machine and training reservations, each of a different
+    # reservable, so every cleaned record is distinct
+    many = [
+        dict(
+            RESERVATIONS[i % 2],
+            id=i,
+            reservable_id=i,
+            reservable={"id": i, "slug": f"item-{i}"},
+        )
+        for i in range(1, 100)
+    ]
+    write_json_file({"reservations": many}, export_file)
+    prefix = reservable_type.lower()
+
+    records, _ = _clean(cleaner, export_file, workers=2)
+
+    assert records == [
+        dict(
+            expected,
+            **{
+                f"{prefix}_id": record["id"],
+                f"{prefix}_url": f"https://fab.example/item-{record['id']}",
+            },
+        )
+        for record in many
+        if record["reservable_type"] == reservable_type
+    ]
+
+
+def test_invalid_output_format_raises(export_file):
+    with pytest.raises(ValueError, match="output_format"):
+        clean_reservations_machine_data(str(export_file), output_format="xml")
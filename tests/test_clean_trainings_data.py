@@ -0,0 +1,81 @@
+"""Tests for fabmanager_data_analyzer_zumat.clean_trainings_data."""
+
+import random
+
+import pytest
+from html_reference import VALID_HTML, random_html, reference_clean_html_keep_links
+
+from fabmanager_data_analyzer_zumat import utils
+from fabmanager_data_analyzer_zumat.clean_trainings_data import (
+    clean_html_keep_links,
+    clean_training_record,
+    clean_trainings_data,
+)
+
+
+@pytest.mark.parametrize("html_content", VALID_HTML)
+def test_clean_html_keep_links_matches_html_parser(html_content):
+    expected = reference_clean_html_keep_links(html_content, collapse_whitespace=False)
+
+    assert clean_html_keep_links(html_content) == expected
+
+
+def test_clean_html_keep_links_matches_html_parser_on_random_html():
+    rng = random.Random(1)
+    for _ in range(2000):
+        html_content = random_html(rng)
+        expected = reference_clean_html_keep_links(
+            html_content, collapse_whitespace=False
+        )
+        assert clean_html_keep_links(html_content) == expected, html_content
+
+
+def test_clean_html_keep_links_keeps_inner_whitespace():
+    html_content = "<p>line one\n  line <a href='u'>two</a></p>"
+
+    assert clean_html_keep_links(html_content) == "line one\n  line two (u)"
+    assert utils.clean_html_keep_links(html_content) == "line one line two (u)"
+
+
+def test_clean_html_keep_links_without_anchors():
+    assert clean_html_keep_links("  <p>No <b>links</b> here</p>\n") == "No links here"
+    assert clean_html_keep_links("  plain text  ") == "plain text"
+
+
+TRAININGS = [
+    {"id": 1, "name": "Laser", "description": "<p>Bring &amp; wear <b>glasses</b></p>"},
+    {"id": 2, "name": "Lathe", "description": "Plain text, no markup"},
+    {
+        "id": 3,
+        "name": "3D printing",
+        "description": '<p>See <a href="https://example.com/guide">the guide</a></p>',
+    },
+    {"id": 4, "name": "Sewing", "description": ""},
+]
+
+CLEANED_DESCRIPTIONS = [
+    "Bring & wear glasses",
+    "Plain text, no markup",
+    "See the guide (https://example.com/guide)",
+    "",
+]
+
+
+def test_clean_training_record_cleans_descriptions():
+    cleaned = [clean_training_record(training) for training in TRAININGS]
+
+    assert [record["description"] for record in cleaned] == CLEANED_DESCRIPTIONS
+    assert all("id" not in record for record in cleaned)
+
+
+def test_clean_trainings_data_cleans_descriptions(tmp_path):
+    input_file = tmp_path / "FabManager_ExportedData_Trainings_02_03_2025_10-30.json"
+    utils.write_json_file({"trainings": TRAININGS}, input_file)
+    output_file = tmp_path / "cleaned.json"
+
+    trainings, path = clean_trainings_data(str(input_file), str(output_file))
+
+    assert [record["description"] for record in trainings] == CLEANED_DESCRIPTIONS
+    output = utils.load_json_file(path)
+    assert output["trainings"] == trainings
+    assert output["metadata"]["data_exported_at"] == "2025-03-02T10:30"
@@ -0,0 +1,77 @@
+"""Tests for the save_* functions of the extract modules."""
+
+import os
+
+import pytest
+
+from fabmanager_data_analyzer_zumat.extract_machines import save_machines
+from fabmanager_data_analyzer_zumat.extract_reservation import save_reservations
+from fabmanager_data_analyzer_zumat.extract_trainings import save_trainings
+from fabmanager_data_analyzer_zumat.extract_users import save_users
+from fabmanager_data_analyzer_zumat.utils import load_json_file
+
+RECORDS = [{"id": 1, "name": "Laser cutter"}, {"id": 2, "name": "Lathe"}]
+RESERVATIONS = [
+    {"id": 1, "reservable_type": "Machine"},
+    {"id": 2, "reservable_type": "Training"},
+]
+
+
+def _save(kind, tmp_path, **kwargs):
+    """Save a fixed export with generated, untimestamped filenames."""
+    if kind == "machines":
+        return [save_machines(RECORDS, tmp_path, add_timestamp=False, **kwargs)]
+    if kind == "trainings":
+        return [save_trainings(RECORDS, tmp_path, add_timestamp=False, **kwargs)]
+    if kind == "users":
+        return [save_users(RECORDS, str(tmp_path), custom_filename="users", **kwargs)]
+    if kind == "reservations":
+        return [
+            save_reservations(RESERVATIONS, tmp_path, add_timestamp=False, **kwargs)
+        ]
+    filepaths = save_reservations(
+        RESERVATIONS, tmp_path, add_timestamp=False, divide_by_type=True, **kwargs
+    )
+    return sorted(filepaths.values())
+
+
+KINDS = ["machines", "trainings", "users", "reservations", "divided_reservations"]
+
+
+def _age(paths):
+    """Move the modification time of saved files an hour back."""
+    for path in paths:
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns - 3600 * 10**9))
+    return [os.stat(path).st_mtime_ns for path in paths]
+
+
+@pytest.mark.parametrize("kind", KINDS)
+def test_unchanged_exports_are_rewritten_by_default(tmp_path, kind):
+    paths = _save(kind, tmp_path)
+    mtimes = _age(paths)
+
+    assert _save(kind, tmp_path) == paths
+    assert all(os.stat(p).st_mtime_ns > m for p, m in zip(paths, mtimes))
+
+
+@pytest.mark.parametrize("kind", KINDS)
+@pytest.mark.parametrize("compression", [None, "gzip"])
+def test_unchanged_exports_are_skipped_when_asked(tmp_path, kind, compression):
+    paths = _save(kind, tmp_path, output_compression=compression)
+    mtimes = _age(paths)
+
+    assert (
+        _save(kind, tmp_path, output_compression=compression, skip_unchanged=True)
+        == paths
+    )
+    assert [os.stat(p).st_mtime_ns for p in paths] == mtimes
+
+
+def test_changed_export_is_written_when_skipping_unchanged(tmp_path):
+    (path,) = _save("machines", tmp_path)
+    _age([path])
+
+    save_machines(RECORDS[:1], tmp_path, add_timestamp=False, skip_unchanged=True)
+
+    assert load_json_file(path) == {"machines": [{"id": 1, "name": "Laser cutter"}]}
@@ -0,0 +1,71 @@
+"""Tests for the public names exported by the fabmanager_data_analyzer_zumat package."""
+
+import subprocess
+import sys
+
+import pytest
+
+import fabmanager_data_analyzer_zumat as package
+
+# Exported functions that share their name with the submodule defining them
+SUBMODULE_NAMED_FUNCTIONS = [
+    "clean_machines_data",
+    "clean_trainings_data",
+    "extract_machines",
+    "extract_trainings",
+    "extract_users",
+    "merge_cleaned_data",
+]
+
+
+def _run_in_fresh_interpreter(code: str) -> None:
+    """Run code in a new interpreter, so no package submodule is imported yet."""
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+@pytest.mark.parametrize("name", SUBMODULE_NAMED_FUNCTIONS)
+def test_function_is_exported_after_its_submodule_was_imported(name):
+    _run_in_fresh_interpreter(
+        f"import types\n"
+        f"import fabmanager_data_analyzer_zumat.{name}\n"
+        f"from fabmanager_data_analyzer_zumat import {name}\n"
+        f"assert callable({name}), {name}\n"
+        f"assert not isinstance({name}, types.ModuleType), {name}\n"
+    )
+
+
+def test_lazy_name_is_exported_after_its_submodule_was_imported():
+    _run_in_fresh_interpreter(
+        "import fabmanager_data_analyzer_zumat.clean_reservations_machine\n"
+        "from fabmanager_data_analyzer_zumat import calculate_time_spent\n"
+        "assert callable(calculate_time_spent)\n"
+    )
+
+
+def test_package_import_does_not_load_http_or_process_pool_modules():
+    _run_in_fresh_interpreter(
+        "import sys\n"
+        "import fabmanager_data_analyzer_zumat\n"
+        "for name in ('requests', 'urllib3', 'concurrent.futures.process', 'csv'):\n"
+        "    assert name not in sys.modules, name\n"
+    )
+
+
+@pytest.mark.parametrize("name", [n for n in package.__all__ if not n.startswith("__")])
+def test_every_public_name_resolves(name):
+    assert callable(getattr(package, name))
+
+
+def test_backward_compatible_aliases_default_to_machines():
+    from fabmanager_data_analyzer_zumat import clean_machines_data as machines
+
+    assert package.clean_html_keep_links is package.clean_html_keep_links_machines
+    assert package.extract_timestamp_from_filename is (
+        package.extract_timestamp_from_filename_machines
+    )
+    assert package.clean_machines_data is machines
+
+
+def test_unknown_name_raises_attribute_error():
+    with pytest.raises(AttributeError):
+        package.not_a_public_name
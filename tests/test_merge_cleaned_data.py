@@ -0,0 +1,120 @@
+"""Tests for fabmanager_data_analyzer_zumat.merge_cleaned_data."""
+
+import gzip
+import json
+
+import pytest
+
+from fabmanager_data_analyzer_zumat.merge_cleaned_data import merge_cleaned_data
+from fabmanager_data_analyzer_zumat.utils import load_json_file, write_json_file
+
+MACHINES = [{"id": 1, "name": "Laser cutter"}, {"id": 2, "name": "Lathe"}]
+RESERVATIONS = [{"machine_id": 1, "canceled": "False"}]
+
+
+@pytest.fixture
+def cleaned_files(tmp_path):
+    machines = tmp_path / "machines.json"
+    write_json_file(
+        {
+            "machines": MACHINES,
+            "metadata": {
+                "license": "CC0",
+                "data_exported_at": "2025-03-02T10:30",
+                "data_cleaned_at": "2025-03-03T08:00:00",
+            },
+        },
+        machines,
+    )
+    # Inputs may be gzip-compressed
+    reservations = tmp_path / "reservations_machine.json.gz"
+    write_json_file(
+        {
+            "reservations": RESERVATIONS,
+            "metadata": {"license": "other", "data_exported_at": "2025-03-01T09:00"},
+        },
+        reservations,
+        "gzip",
+    )
+    return {
+        "machines_data_path": str(machines),
+        "reservations_machine_data_path": str(reservations),
+    }
+
+
+def _read_lines(path):
+    content = path.read_bytes()
+    if path.suffix == ".gz":
+        content = gzip.decompress(content)
+    return [json.loads(line) for line in content.decode("utf-8").splitlines()]
+
+
+@pytest.mark.parametrize("compression", [None, "gzip"])
+def test_json_lines_output(tmp_path, cleaned_files, compression):
+    output_file = tmp_path / ("merged.jsonl.gz" if compression else "merged.jsonl")
+
+    output_data, path = merge_cleaned_data(
+        **cleaned_files,
+        output_file=str(output_file),
+        timezone="UTC",
+        output_format="jsonl",
+        output_compression=compression,
+    )
+
+    assert path == str(output_file)
+    lines = _read_lines(output_file)
+    assert lines[0] == {"metadata": output_data["metadata"]}
+    assert lines[1:] == [
+        {"type": "machines", "record": MACHINES[0]},
+        {"type": "machines", "record": MACHINES[1]},
+        {"type": "reservations_machine", "record": RESERVATIONS[0]},
+    ]
+
+
+def test_metadata_is_merged(tmp_path, cleaned_files):
+    output_data, _ = merge_cleaned_data(
+        **cleaned_files,
+        output_file=str(tmp_path / "merged.jsonl"),
+        timezone="UTC",
+        output_format="jsonl",
+    )
+
+    metadata = output_data["metadata"]
+    assert metadata["license"] == "CC0"
+    assert metadata["timezone"] == "UTC"
+    assert metadata["machine_data_exported_at"] == "2025-03-02T10:30"
+    assert metadata["machine_data_cleaned_at"] == "2025-03-03T08:00:00"
+    assert metadata["reservations_machine_data_exported_at"] == "2025-03-01T09:00"
+
+
+def test_generated_filename_has_format_extension(tmp_path, monkeypatch, cleaned_files):
+    monkeypatch.chdir(tmp_path)
+
+    _, path = merge_cleaned_data(
+        **cleaned_files, output_format="jsonl", output_compression="gzip"
+    )
+
+    assert path.endswith(".jsonl.gz")
+    assert _read_lines(tmp_path / path)[0]["metadata"]["license"] == "CC0"
+
+
+def test_json_output_matches_json_lines(tmp_path, cleaned_files):
+    output_file = tmp_path / "merged.json"
+
+    output_data, _ = merge_cleaned_data(**cleaned_files, output_file=str(output_file))
+
+    assert load_json_file(output_file) == output_data
+    assert output_data["data"] == {
+        "machines": MACHINES,
+        "reservations_machine": RESERVATIONS,
+    }
+
+
+def test_invalid_output_format_raises(cleaned_files):
+    with pytest.raises(ValueError, match="output_format"):
+        merge_cleaned_data(**cleaned_files, output_format="csv")
+
+
+def test_single_input_raises(cleaned_files):
+    with pytest.raises(ValueError, match="At least 2"):
+        merge_cleaned_data(machines_data_path=cleaned_files["machines_data_path"])
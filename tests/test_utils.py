@@ -0,0 +1,196 @@
+"""Tests for the file helpers in fabmanager_data_analyzer_zumat.utils."""
+
+import csv
+import gzip
+import io
+import json
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from fabmanager_data_analyzer_zumat import utils
+from fabmanager_data_analyzer_zumat.utils import load_json_file, parse_json
+
+WIDE_INTEGERS = [
+    18446744073709551616,  # 2**64
+    -9223372036854775809,  # -2**63 - 1
+    1180591620717411303424,  # 2**70
+]
+
+
+@pytest.mark.parametrize("value", WIDE_INTEGERS)
+def test_parse_json_keeps_integers_wider_than_64_bits(value):
+    content = json.dumps({"value": value, "other": [1, 2.5]}).encode("utf-8")
+
+    parsed = parse_json(content)
+
+    assert parsed["value"] == value
+    assert isinstance(parsed["value"], int)
+    assert parsed["other"] == [1, 2.5]
+
+
+def test_parse_json_accepts_memoryview():
+    content = json.dumps([2**70, "x"]).encode("utf-8")
+
+    assert parse_json(memoryview(content)) == [2**70, "x"]
+
+
+def test_wide_integer_check_finds_runs_across_scan_chunks(monkeypatch):
+    monkeypatch.setattr(utils, "_DIGIT_RUN_SCAN_SIZE", 8)
+    content = json.dumps({"padding": "abc", "value": 2**64}).encode("utf-8")
+
+    assert utils._may_contain_wide_integers(content)
+    assert not utils._may_contain_wide_integers(b'{"value": 2**63, "id": 12345}')
+
+
+@pytest.mark.parametrize("compressed", [False, True])
+def test_load_json_file_keeps_wide_integers(tmp_path, monkeypatch, compressed):
+    # Force the memory-mapped path for a small file
+    monkeypatch.setattr(utils, "MMAP_THRESHOLD", 0)
+    path = tmp_path / "data.json"
+    utils.write_json_file(
+        {"machines": [{"id": 2**70}]}, path, "gzip" if compressed else None
+    )
+
+    assert load_json_file(path) == {"machines": [{"id": 2**70}]}
+
+
+def _read_output(path):
+    content = path.read_bytes()
+    if content[:2] == b"\x1f\x8b":
+        content = gzip.decompress(content)
+    return content.decode("utf-8")
+
+
+def _gzip_header_name(path):
+    content = path.read_bytes()
+    assert content[3] & 0x08, "no FNAME field"
+    end = content.index(b"\0", 10)
+    return content[10:end].decode("latin-1")
+
+
+def _leftover_files(directory, *expected):
+    return sorted(p.name for p in directory.iterdir() if p.name not in expected)
+
+
+@pytest.mark.parametrize("compression", [None, "gzip"])
+@pytest.mark.parametrize("compact", [False, True])
+def test_write_json_file_round_trip(tmp_path, compression, compact):
+    data = {"machines": [{"id": 1, "name": "Laser é"}, {"id": 2, "ok": None}]}
+    path = tmp_path / "machines.json"
+
+    assert utils.write_json_file(data, path, compression, compact)
+
+    assert load_json_file(path) == data
+    assert _read_output(path) == json.dumps(
+        data,
+        ensure_ascii=False,
+        indent=None if compact else 2,
+        separators=(",", ":") if compact else None,
+    )
+    assert _leftover_files(tmp_path, "machines.json") == []
+
+
+def test_write_json_file_gzip_header_names_the_output_file(tmp_path):
+    path = tmp_path / "machines.json.gz"
+
+    utils.write_json_file({"machines": []}, path, "gzip")
+
+    assert _gzip_header_name(path) == "machines.json"
+
+
+def test_write_json_lines_file_round_trip(tmp_path):
+    items = [{"metadata": {"a": 1}}, {"type": "machines", "record": {"id": 1}}]
+    path = tmp_path / "merged.jsonl.gz"
+
+    utils.write_json_lines_file(iter(items), path, "gzip")
+
+    lines = _read_output(path).splitlines()
+    assert [json.loads(line) for line in lines] == items
+    assert _gzip_header_name(path) == "merged.jsonl"
+
+
+@pytest.mark.parametrize("compression", [None, "gzip"])
+def test_write_csv_file_round_trip(tmp_path, compression):
+    records = [{"id": 1, "name": "a,b"}, {"id": 2, "canceled": "True"}]
+    path = tmp_path / "reservations.csv"
+
+    utils.write_csv_file(records, path, compression)
+
+    rows = list(csv.DictReader(io.StringIO(_read_output(path))))
+    assert rows == [
+        {"id": "1", "name": "a,b", "canceled": ""},
+        {"id": "2", "name": "", "canceled": "True"},
+    ]
+
+
+def test_failed_write_keeps_the_previous_file(tmp_path):
+    path = tmp_path / "machines.json"
+    utils.write_json_file({"machines": [1]}, path)
+
+    with pytest.raises(TypeError):
+        utils.write_json_file({"machines": [object()]}, path)
+
+    assert load_json_file(path) == {"machines": [1]}
+    assert _leftover_files(tmp_path, "machines.json") == []
+
+
+def test_unsupported_compression_raises_before_writing(tmp_path):
+    with pytest.raises(ValueError):
+        utils.write_json_file({}, tmp_path / "data.json", "zip")
+
+    assert _leftover_files(tmp_path) == []
+
+
+def test_concurrent_writers_do_not_share_temporary_files(tmp_path):
+    path = tmp_path / "data.json"
+    payloads = [{"writer": n, "items": [n] * 20000} for n in range(8)]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for future in [
+            executor.submit(utils.write_json_file, payload, path)
+            for payload in payloads
+        ]:
+            future.result()
+
+    assert load_json_file(path) in payloads
+    assert _leftover_files(tmp_path, "data.json") == []
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX file modes and symlinks")
+def test_write_preserves_mode_of_existing_file(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text("{}")
+    path.chmod(0o640)
+
+    utils.write_json_file({"a": 1}, path)
+
+    assert stat.S_IMODE(path.stat().st_mode) == 0o640
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX file modes and symlinks")
+def test_new_file_gets_default_mode(tmp_path):
+    umask = os.umask(0o022)
+    os.umask(umask)
+    path = tmp_path / "data.json"
+
+    utils.write_json_file({"a": 1}, path)
+
+    assert stat.S_IMODE(path.stat().st_mode) == 0o666 & ~umask
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX file modes and symlinks")
+def test_write_goes_through_symlinks(tmp_path):
+    target = tmp_path / "exports" / "data.json"
+    target.parent.mkdir()
+    target.write_text("{}")
+    link = tmp_path / "latest.json"
+    link.symlink_to(target)
+
+    utils.write_json_file({"a": 1}, link)
+
+    assert link.is_symlink()
+    assert load_json_file(target) == {"a": 1}
+    assert _leftover_files(tmp_path, "exports", "latest.json") == []